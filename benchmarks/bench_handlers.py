@@ -0,0 +1,193 @@
+"""Measure the throughput of each handler on the synthetic corpus.
+
+Every handler runs in a fresh process, on the files generated by corpus.py,
+and reports pages/sec, MB/sec (of input), the per page latency percentiles
+and the peak RSS of its process. A run can be saved as a baseline and later
+runs compared to it: the script exits with 1 when a handler got slower than
+the threshold allows.
+
+Usage: python benchmarks/bench_handlers.py [--corpus DIR] [--pages N]
+    [--scale F] [--attachments N] [--seed N] [--repeat N] [--handlers NAME ...]
+    [--output FILE] [--baseline FILE] [--threshold F]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+from collections.abc import Callable
+
+from corpus import CorpusSpec, generate
+
+from splitter import FileHandler
+from splitter.eml.eml_handler import EmlHandler
+from splitter.eml.stdlib_eml_handler import StdlibEmlHandler
+from splitter.image.image_handler import ImageHandler
+from splitter.image.tiff_handler import TifHandler
+from splitter.instrumentation import percentile
+from splitter.pdf.pdf_handler import FitzPdfHandler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+def _attachment_handler() -> FileHandler:
+    file_handler = FileHandler()
+    file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+    file_handler.register_converter(ImageHandler(), [".png", ".jpg"])
+    return file_handler
+
+
+# name: (corpus file, converter factory, extension)
+CASES: dict[str, tuple[str, Callable[[], Any], str]] = {
+    "pdf-text": ("text.pdf", FitzPdfHandler, ".pdf"),
+    "pdf-scanned": ("scanned.pdf", FitzPdfHandler, ".pdf"),
+    "tiff": ("multipage.tiff", TifHandler, ".tiff"),
+    "jpeg": ("large.jpg", ImageHandler, ".jpg"),
+    "eml": ("attachments.eml", lambda: EmlHandler(_attachment_handler()), ".eml"),
+    "eml-stdlib": (
+        "attachments.eml",
+        lambda: StdlibEmlHandler(_attachment_handler()),
+        ".eml",
+    ),
+}
+
+# Compared to the baseline: (metric, True if higher is better)
+CHECKED_METRICS = (("pages_per_sec", True), ("p95_ms", False))
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def run_case(name: str, path: Path, repeat: int) -> dict[str, Any]:
+    """Split ``path`` ``repeat`` times, in the current process."""
+    _, factory, extension = CASES[name]
+    file_handler = FileHandler()
+    file_handler.register_converter(factory(), [extension])
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        previous = time.perf_counter()
+        for page in file_handler.split_document(path):
+            # Pages may be encoded lazily, count the encoding too
+            page.unwrap().stream.read()
+            now = time.perf_counter()
+            latencies.append(now - previous)
+            previous = now
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "pages": len(latencies) // repeat,
+        "pages_per_sec": len(latencies) / duration,
+        "mb_per_sec": path.stat().st_size * repeat / duration / 1e6,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p95_ms": percentile(latencies, 95) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_isolated(name: str, path: Path, repeat: int) -> dict[str, Any]:
+    # A new process per handler, or the peak RSS would be the max of all
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, name, path, repeat).result()
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+) -> list[str]:
+    """Return the regressions of ``results`` over ``baseline``."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher_is_better in CHECKED_METRICS:
+            reference = baseline.get(name, {}).get(metric)
+            if not reference:
+                continue
+
+            change = metrics[metric] / reference - 1
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    f"{name}: {metric} {reference:.2f} -> {metrics[metric]:.2f}"
+                    f" ({change:+.1%})"
+                )
+
+    return regressions
+
+
+def print_results(results: dict[str, dict[str, Any]]) -> None:
+    print(
+        f"{'handler':<12} {'pages':>6} {'pages/s':>9} {'MB/s':>8}"
+        f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}"
+    )
+    for name, metrics in results.items():
+        rss = metrics["peak_rss_mb"]
+        print(
+            f"{name:<12} {metrics['pages']:>6} {metrics['pages_per_sec']:>9.1f}"
+            f" {metrics['mb_per_sec']:>8.2f} {metrics['p50_ms']:>8.1f}"
+            f" {metrics['p95_ms']:>8.1f} {metrics['p99_ms']:>8.1f}"
+            f" {'-' if rss is None else f'{rss:.0f}':>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", type=Path, default=None)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--attachments", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--handlers", nargs="*", choices=CASES, default=list(CASES))
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    corpus = args.corpus or Path(tempfile.gettempdir()) / "splitter-corpus"
+    spec = CorpusSpec(args.pages, args.scale, args.attachments, args.seed)
+    paths = generate(corpus, spec)
+
+    results = {
+        name: run_isolated(name, paths[CASES[name][0]], args.repeat)
+        for name in args.handlers
+    }
+    print_results(results)
+
+    corpus_info = vars(spec) | {"repeat": args.repeat}
+    if args.output:
+        report = {"corpus": corpus_info, "results": results}
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["corpus"] != corpus_info:
+            print(f"WARNING the baseline corpus differs: {baseline['corpus']}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare the time taken by the MIME readers to sniff the test inputs.
+
+Usage: python benchmarks/bench_mime_readers.py [FILE ...] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+from pathlib import Path
+
+from splitter.mime_reader import IMimeReader, MimeReader, SignatureMimeReader
+from splitter.mime_reader.magic_mime_reader import MagicMimeReader
+
+INPUTS = Path(__file__).parents[1] / "tests" / "inputs"
+
+
+def run(mime_reader: IMimeReader, path: Path, repeat: int) -> tuple[str, float]:
+    stream = io.BytesIO(path.read_bytes())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        mime_type = mime_reader.get_mime_type(path.name, stream)
+
+    return mime_type, (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    files = args.files or sorted(path for path in INPUTS.iterdir() if path.is_file())
+
+    start = time.perf_counter()
+    mime_readers: dict[str, IMimeReader] = {
+        "extension": MimeReader(),
+        "signature": SignatureMimeReader(fallbacks=[]),
+        "libmagic": MagicMimeReader(),
+    }
+    print(f"readers initialised in {(time.perf_counter() - start) * 1e3:.1f} ms\n")
+
+    print(f"{'file':<24}" + "".join(f"{name:>38}" for name in mime_readers))
+    for path in files:
+        row = f"{path.name:<24}"
+        for mime_reader in mime_readers.values():
+            mime_type, duration = run(mime_reader, path, args.repeat)
+            row += f"{mime_type:>26} {duration:>8.1f} µs"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
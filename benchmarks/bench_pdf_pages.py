@@ -0,0 +1,95 @@
+"""Compare the two-pass and the single-pass page loops on a text-only PDF.
+
+The two-pass loop is the previous ``_get_pages``: every page was loaded once
+to extract its text, then a second time to render it.
+
+Usage: python benchmarks/bench_pdf_pages.py [--pages N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable, Iterable
+
+import fitz
+
+from splitter.pdf.pdf_handler import (
+    PdfHandlerParams,
+    _get_image_page,
+    _get_page_text,
+    _get_pages,
+)
+
+
+def make_document(pages: int) -> bytes:
+    with fitz.open() as document:
+        for number in range(1, pages + 1):
+            page = document.new_page()
+            for line in range(40):
+                page.insert_text(
+                    (72, 72 + 16 * line), f"Page {number}, line {line}: lorem ipsum"
+                )
+        return document.tobytes()
+
+
+def two_pass_pages(
+    document: fitz.Document, params: PdfHandlerParams
+) -> Iterable[object]:
+    total_pages = len(document)
+    pages_info = (
+        _get_page_text(document[index], params) for index in range(total_pages)
+    )
+    for index, ((text_content, enough_text), page) in enumerate(
+        zip(pages_info, document.pages(), strict=True)
+    ):
+        page_metadata = {"page_number": index + 1, "total_pages": total_pages}
+        page_content = [text_content] if enough_text else []
+        if not params.always_extract_image and enough_text:
+            yield page_metadata, page_content, None
+            continue
+
+        # Second load of the page, to render it
+        yield _get_image_page(page, params, page_metadata, page_content)
+
+
+def single_pass_pages(
+    document: fitz.Document, params: PdfHandlerParams
+) -> Iterable[object]:
+    return _get_pages(document, params)
+
+
+def run(
+    pdf_bytes: bytes,
+    get_pages: Callable[[fitz.Document, PdfHandlerParams], Iterable[object]],
+    repeat: int,
+) -> float:
+    params = PdfHandlerParams(always_extract_image=False)
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as document:
+            for _page in get_pages(document, params):
+                pages += 1
+
+    return pages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdf_bytes = make_document(args.pages)
+    before = run(pdf_bytes, two_pass_pages, args.repeat)
+    after = run(pdf_bytes, single_pass_pages, args.repeat)
+
+    print(f"{'pages':>8} {'two-pass':>14} {'single-pass':>14} {'speedup':>8}")
+    print(
+        f"{args.pages:>8} {before:>10.1f} p/s {after:>10.1f} p/s {after / before:>7.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare the PNG round-trip and the zero-copy Pixmap to numpy conversions.
+
+Usage: python benchmarks/bench_pdf_render.py [PDF ...] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from collections.abc import Callable
+
+import cv2
+import fitz
+import numpy as np
+
+from splitter.image.image import normalize_size
+from splitter.pdf.pdf_handler import (
+    PdfHandlerParams,
+    _get_pix,
+    convert_pixmap_to_rgb,
+    pixmap_to_array,
+)
+
+INPUTS = Path(__file__).parents[1] / "tests" / "inputs"
+DEFAULT_FILES = [INPUTS / "specimen.pdf", INPUTS / "scanned_specimen.pdf"]
+
+
+def png_round_trip(pix: fitz.Pixmap) -> np.ndarray:
+    np_array = np.frombuffer(convert_pixmap_to_rgb(pix).tobytes(), np.uint8)
+    return cv2.imdecode(np_array, cv2.IMREAD_COLOR)
+
+
+def run(
+    path: Path, to_array: Callable[[fitz.Pixmap], np.ndarray], repeat: int
+) -> float:
+    params = PdfHandlerParams()
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with fitz.open(path) as document:
+            for page in document:
+                pix, _ = _get_pix(document, page, params)
+                image_cv = to_array(pix)
+                image_cv, _ = normalize_size(image_cv, params.image_max_size)
+                cv2.imencode(".png", image_cv)
+                pages += 1
+
+    return pages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", type=Path, default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'file':<30} {'png round-trip':>16} {'zero-copy':>16} {'speedup':>8}")
+    for path in args.files:
+        before = run(path, png_round_trip, args.repeat)
+        after = run(path, pixmap_to_array, args.repeat)
+        print(
+            f"{path.name:<30} {before:>10.2f} pg/s {after:>10.2f} pg/s "
+            f"{after / before:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
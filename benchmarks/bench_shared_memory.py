@@ -0,0 +1,144 @@
+"""Compare sending pages back from worker processes pickled or shared.
+
+Two measures, each transport in a fresh process:
+- raw: workers return 2200x1700 colour arrays (a 300 dpi A4 page), the
+  parent touches every array;
+- pdf: a scanned PDF rendered by FitzPdfHandler workers, as arrays and PNG.
+
+Reported are the arrays (or pages) per second and the peak RSS of the
+parent process.
+
+Usage: python benchmarks/bench_shared_memory.py [--arrays N] [--pages N]
+    [--workers N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from corpus import CorpusSpec, generate
+
+from splitter import FileHandler
+from splitter.concurrency import set_worker_budget
+from splitter.image.encoder import ImageEncoder
+from splitter.pdf.pdf_handler import FitzPdfHandler, PdfHandlerParams
+from splitter.shared_memory import (
+    SharedArray,
+    SharedMemoryDirectory,
+    SharedMemoryWriter,
+    shared_memory_supported,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+PAGE_SHAPE = (2200, 1700, 3)
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _make_array(seed: int, directory: str | None) -> Any:
+    array = np.random.default_rng(seed).integers(0, 256, PAGE_SHAPE, np.uint8)
+    if directory is None:
+        return array
+
+    return SharedMemoryWriter(directory).share_array(array)
+
+
+def run_raw(arrays: int, workers: int, shared: bool) -> dict[str, Any]:
+    with (
+        SharedMemoryDirectory() as directory,
+        ProcessPoolExecutor(max_workers=workers) as executor,
+    ):
+        start = time.perf_counter()
+        futures = [
+            executor.submit(_make_array, seed, directory if shared else None)
+            for seed in range(arrays)
+        ]
+        checksum = 0
+        for future in futures:
+            array = future.result()
+            if isinstance(array, SharedArray):
+                array = array.open()
+            checksum += int(array[::100, ::100].sum())
+        duration = time.perf_counter() - start
+
+    return {"per_sec": arrays / duration, "peak_rss_mb": _peak_rss_mb()}
+
+
+def run_pdf(path: Path, workers: int, repeat: int, shared: bool) -> dict[str, Any]:
+    set_worker_budget(workers)
+    params = PdfHandlerParams(
+        encoder=ImageEncoder(output="both"),
+        workers=workers,
+        chunk_size=1,
+        shared_memory=shared,
+    )
+    file_handler = FileHandler()
+    file_handler.register_converter(FitzPdfHandler(params), [".pdf"])
+
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in file_handler.split_document(path):
+            page.unwrap().stream.read()
+            pages += 1
+    duration = time.perf_counter() - start
+
+    return {"per_sec": pages / duration, "peak_rss_mb": _peak_rss_mb()}
+
+
+def run_isolated(function: Any, *args: Any) -> dict[str, Any]:
+    # A new process per transport, or the peak RSS would be the max of both
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(function, *args).result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--arrays", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not shared_memory_supported():
+        sys.exit("Shared memory pages are only supported on POSIX systems")
+
+    corpus = Path(tempfile.gettempdir()) / "splitter-corpus"
+    path = generate(corpus, CorpusSpec(pages=args.pages))["scanned.pdf"]
+
+    print(f"{'measure':<8} {'transport':<10} {'per sec':>9} {'RSS MB':>8}")
+    for shared in (False, True):
+        transport = "shared" if shared else "pickle"
+        for measure, metrics in (
+            ("raw", run_isolated(run_raw, args.arrays, args.workers, shared)),
+            ("pdf", run_isolated(run_pdf, path, args.workers, args.repeat, shared)),
+        ):
+            rss = metrics["peak_rss_mb"]
+            print(
+                f"{measure:<8} {transport:<10} {metrics['per_sec']:>9.1f}"
+                f" {'-' if rss is None else f'{rss:.0f}':>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Deterministic synthetic corpus for the handler benchmarks.
+
+The same arguments always produce the same bytes, so that two runs (or two
+releases) are measured on identical inputs.
+
+Usage: python benchmarks/corpus.py OUTPUT_DIR [--pages N] [--scale F]
+    [--attachments N] [--seed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import fitz
+import numpy as np
+
+WORDS = [
+    *("contrat", "assurance", "sinistre", "habitation", "auto", "client"),
+    *("adresse", "montant", "date", "signature", "garantie", "franchise"),
+    *("police", "agence", "declaration"),
+]
+
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    pages: int = 10  # Pages of the PDFs and the TIFFs
+    scale: float = 1.0  # Size factor of the scanned pages and the JPEGs
+    attachments: int = 5  # Attachments of the EMLs
+    seed: int = 0
+
+
+def _sentence(rng: np.random.Generator, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS, words))
+
+
+def _scan(rng: np.random.Generator, spec: CorpusSpec, number: int) -> np.ndarray:
+    """Draw a grey page of text with some sensor noise, like a scanner output."""
+    width, height = (int(side * spec.scale) for side in PAGE_SIZE)
+    image = np.full((height, width, 3), 245, np.uint8)
+    for line in range(max(height // 40 - 2, 1)):
+        cv2.putText(
+            image,
+            f"{number} {_sentence(rng, 6)}",
+            (40, 60 + 40 * line),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8 * spec.scale,
+            (30, 30, 30),
+            2,
+        )
+    noise = rng.integers(0, 12, image.shape, np.uint8)
+    return cv2.subtract(image, noise)
+
+
+def _to_bytes(document: fitz.Document) -> bytes:
+    # Neither the creation date nor a random file identifier
+    document.set_metadata({"producer": "corpus.py", "creationDate": "", "modDate": ""})
+    return document.tobytes(garbage=3, deflate=True, no_new_id=True)
+
+
+def text_pdf(spec: CorpusSpec) -> bytes:
+    rng = np.random.default_rng(spec.seed)
+    with fitz.open() as document:
+        for number in range(1, spec.pages + 1):
+            page = document.new_page()
+            for line in range(45):
+                page.insert_text((50, 60 + 16 * line), f"{number} {_sentence(rng)}")
+        return _to_bytes(document)
+
+
+def scanned_pdf(spec: CorpusSpec) -> bytes:
+    rng = np.random.default_rng(spec.seed + 1)
+    with fitz.open() as document:
+        for number in range(1, spec.pages + 1):
+            _, jpeg = cv2.imencode(".jpg", _scan(rng, spec, number))
+            page = document.new_page()
+            page.insert_image(page.rect, stream=jpeg.tobytes())
+        return _to_bytes(document)
+
+
+def multipage_tiff(spec: CorpusSpec) -> bytes:
+    rng = np.random.default_rng(spec.seed + 2)
+    pages = [
+        cv2.cvtColor(_scan(rng, spec, number), cv2.COLOR_BGR2GRAY)
+        for number in range(1, spec.pages + 1)
+    ]
+    _, tiff = cv2.imencodemulti(".tiff", pages)
+    return tiff.tobytes()
+
+
+def large_jpeg(spec: CorpusSpec) -> bytes:
+    rng = np.random.default_rng(spec.seed + 3)
+    # Four pages side by side, a photo of a spread out paper file
+    image = np.hstack([_scan(rng, spec, number) for number in range(1, 5)])
+    _, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return jpeg.tobytes()
+
+
+def eml(spec: CorpusSpec) -> bytes:
+    rng = np.random.default_rng(spec.seed + 4)
+    message = EmailMessage()
+    message["Subject"] = "Declaration de sinistre"
+    message["From"] = "client@example.com"
+    message["To"] = "gestion@example.com"
+    message["Date"] = format_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    message.set_content(_sentence(rng, 60))
+
+    # Alternate small text PDFs and scanned pages, as found in claims
+    attachment_spec = CorpusSpec(pages=2, scale=spec.scale / 2, seed=spec.seed)
+    for index in range(spec.attachments):
+        if index % 2:
+            _, png = cv2.imencode(".png", _scan(rng, attachment_spec, index))
+            message.add_attachment(
+                png.tobytes(), "image", "png", filename=f"scan_{index}.png"
+            )
+        else:
+            message.add_attachment(
+                text_pdf(attachment_spec),
+                "application",
+                "pdf",
+                filename=f"document_{index}.pdf",
+            )
+
+    message.set_boundary(f"corpus-{spec.seed}")
+    return message.as_bytes()
+
+
+GENERATORS = {
+    "text.pdf": text_pdf,
+    "scanned.pdf": scanned_pdf,
+    "multipage.tiff": multipage_tiff,
+    "large.jpg": large_jpeg,
+    "attachments.eml": eml,
+}
+
+
+def generate(directory: Path, spec: CorpusSpec) -> dict[str, Path]:
+    """Write the corpus to ``directory``, files already generated are kept."""
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f"p{spec.pages}-s{spec.scale:g}-a{spec.attachments}-r{spec.seed}"
+
+    paths = {}
+    for name, generator in GENERATORS.items():
+        stem, extension = name.split(".")
+        path = directory / f"{stem}-{suffix}.{extension}"
+        if not path.exists():
+            path.write_bytes(generator(spec))
+        paths[name] = path
+
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--attachments", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(args.pages, args.scale, args.attachments, args.seed)
+    for path in generate(args.output, spec).values():
+        print(f"{path} ({path.stat().st_size / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
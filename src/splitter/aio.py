@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Any, TypeVar
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+
+__all__ = ["EXHAUSTED", "iterate_in_executor"]
+
+T = TypeVar("T")
+
+# Default of next(), returned once an iterator is exhausted
+EXHAUSTED: Any = object()
+
+
+class _LockedIterator(Iterator[T]):
+    """Iterator stepped and closed from executor threads, one call at a time."""
+
+    def __init__(self, iterable_factory: Callable[[], Iterable[T]]) -> None:
+        self._lock = threading.Lock()
+        self._iterable_factory = iterable_factory
+        self._iterator: Iterator[T] | None = None
+
+    def __next__(self) -> T:
+        with self._lock:
+            if self._iterator is None:
+                self._iterator = iter(self._iterable_factory())
+
+            return next(self._iterator)
+
+    def close(self) -> None:
+        with self._lock:
+            # Generators run their finally and with blocks (closing documents)
+            close = getattr(self._iterator, "close", None)
+            if close is not None:
+                close()
+
+
+async def iterate_in_executor(
+    iterable_factory: Callable[[], Iterable[T]],
+    executor: Executor | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+) -> AsyncIterator[T]:
+    """Iterate over a blocking iterable, running each step in the executor.
+
+    The iterable itself is created in the executor. When the iteration stops
+    early (break, cancellation, ...) the underlying iterator is closed once
+    the running step is over.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = _LockedIterator(iterable_factory)
+    semaphore = semaphore or asyncio.Semaphore(1)
+
+    try:
+        while True:
+            async with semaphore:
+                item = await loop.run_in_executor(executor, next, iterator, EXHAUSTED)
+
+            if item is EXHAUSTED:
+                return
+
+            yield item
+    finally:
+        await asyncio.shield(loop.run_in_executor(executor, iterator.close))
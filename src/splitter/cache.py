@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, is_dataclass
+from pathlib import Path
+from typing import Any, cast
+from collections.abc import Iterable, Iterator
+
+from returns.result import Success
+
+from splitter.file import File, FileOrError, MetadataType, TextContent
+from splitter.interfaces import IExtensionHandler
+
+__all__ = ["CacheStats", "SplitCache", "get_fingerprint"]
+
+# Bump when the layout of the cache entries changes
+_CACHE_VERSION = 2
+_MANIFEST = "manifest.json"
+_CHUNK_SIZE = 1 << 20
+_IGNORED_ATTRIBUTES = {"observer", "_observer"}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+def get_fingerprint(converter: IExtensionHandler) -> str | None:
+    """Identify the converter and its parameters, None if not cacheable.
+
+    Converters may define a ``cache_key()`` method, otherwise their attributes
+    must be JSON serializable (dataclasses included).
+    """
+    cache_key = getattr(converter, "cache_key", None)
+    if callable(cache_key):
+        return str(cache_key())
+
+    # Pages output as arrays only would be replayed with neither bytes nor image
+    if _get_output(converter) == "array":
+        return None
+
+    converter_type = type(converter)
+    # Observers do not change the split results
+    attributes = {
+        name: value
+        for name, value in vars(converter).items()
+        if name not in _IGNORED_ATTRIBUTES
+    }
+    try:
+        parameters = json.dumps(attributes, sort_keys=True, default=_to_json)
+    except TypeError:
+        return None
+
+    return f"{converter_type.__module__}.{converter_type.__qualname__}:{parameters}"
+
+
+def _get_output(converter: IExtensionHandler) -> str | None:
+    params = getattr(converter, "params", None)
+    encoder = getattr(converter, "encoder", getattr(params, "encoder", None))
+    return getattr(encoder, "output", None)
+
+
+def _to_json(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SplitCache:
+    """Content addressed cache of split results, stored in a local directory.
+
+    Entries are keyed on the input bytes and the converter parameters and
+    hold each page bytes, text contents and metadata. The least recently
+    used entries are evicted once the cache grows over ``max_bytes``.
+    Cached pages are replayed without their ImageContent.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 1 << 30) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict(self._scan())
+        self.size = sum(self._entries.values())
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Copies in worker processes share the directory, not the lock
+        state = vars(self).copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        vars(self).update(state)
+        self._lock = threading.Lock()
+
+    def split(self, file: File, converter: IExtensionHandler) -> Iterable[FileOrError]:
+        fingerprint = get_fingerprint(converter)
+        if fingerprint is None:
+            return converter.to_files(file)
+
+        key = _get_key(file, fingerprint)
+        # Identical documents share their entry whatever their name: page
+        # names are stored relative to the document name
+        name = Path(file.vpath).name
+        pages = self._read(key, name)
+
+        with self._lock:
+            if pages is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        if pages is not None:
+            return [Success(page) for page in pages]
+
+        return self._record(key, name, converter.to_files(file))
+
+    def _scan(self) -> list[tuple[str, int]]:
+        entries = [
+            (manifest.stat().st_mtime, manifest.parent)
+            for manifest in self.directory.glob(f"*/{_MANIFEST}")
+        ]
+        return [
+            (entry.name, sum(path.stat().st_size for path in entry.iterdir()))
+            for _, entry in sorted(entries)
+        ]
+
+    def _read(self, key: str, name: str) -> list[File] | None:
+        entry = self.directory / key
+        try:
+            manifest = json.loads((entry / _MANIFEST).read_text("utf-8"))
+            pages = [
+                _load_page(entry, index, page, name)
+                for index, page in enumerate(manifest)
+            ]
+            os.utime(entry / _MANIFEST)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        return pages
+
+    def _record(
+        self, key: str, name: str, pages: Iterable[FileOrError]
+    ) -> Iterator[FileOrError]:
+        # Pages are written as they are yielded, before the caller reads (or
+        # releases) their streams
+        temporary = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.directory))
+        manifest: list[dict[str, Any]] | None = []
+        try:
+            for page in pages:
+                manifest = self._record_page(temporary, manifest, page, name)
+                yield page
+
+            if manifest is not None:
+                self._write(key, temporary, manifest)
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    @staticmethod
+    def _record_page(
+        temporary: Path,
+        manifest: list[dict[str, Any]] | None,
+        page: FileOrError,
+        name: str,
+    ) -> list[dict[str, Any]] | None:
+        file = page.value_or(None)
+        # Never cache a partial result
+        if manifest is None or file is None:
+            return None
+
+        try:
+            manifest.append(_dump_page(temporary, len(manifest), file, name))
+        except OSError:
+            return None
+
+        return manifest
+
+    def _write(self, key: str, temporary: Path, manifest: list[dict[str, Any]]) -> None:
+        try:
+            (temporary / _MANIFEST).write_text(json.dumps(manifest), "utf-8")
+            size = sum(path.stat().st_size for path in temporary.iterdir())
+            temporary.rename(self.directory / key)
+        except (OSError, TypeError, ValueError):
+            # Not serializable, or already written by another process
+            return
+
+        with self._lock:
+            self._entries[key] = size
+            self.size += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and self.size > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self.size -= size
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+            self.stats.evictions += 1
+
+
+def _get_key(file: File, fingerprint: str) -> str:
+    digest = hashlib.sha256(f"{_CACHE_VERSION}:{fingerprint}".encode())
+
+    if not file.stream.seekable():
+        file.stream = io.BytesIO(file.stream.read())
+
+    position = file.stream.tell()
+    for chunk in iter(lambda: file.stream.read(_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.stream.seek(position)
+
+    return digest.hexdigest()
+
+
+def _dump_page(entry: Path, index: int, page: File, name: str) -> dict[str, Any]:
+    # The whole stream, wherever its position
+    position = page.stream.tell()
+    page.stream.seek(0)
+    (entry / f"{index}.bin").write_bytes(page.stream.read())
+    page.stream.seek(position)
+
+    # The document name is replaced by the name of the document replayed
+    metadata = dict(page.metadata or {})
+    from_document = metadata.get("original_filename") == name
+    if from_document:
+        del metadata["original_filename"]
+
+    return {
+        "vpath": page.vpath,
+        "suffix": page.vpath[len(name) :] if page.vpath.startswith(name) else None,
+        "texts": [
+            {"text": content.text, "source": content.source}
+            for content in page.text_contents
+        ],
+        "metadata": metadata,
+        "original_filename": from_document,
+    }
+
+
+def _load_page(entry: Path, index: int, page: dict[str, Any], name: str) -> File:
+    metadata = page["metadata"]
+    if page["original_filename"]:
+        metadata["original_filename"] = name
+
+    suffix = page["suffix"]
+    return File(
+        page["vpath"] if suffix is None else name + suffix,
+        stream=io.BytesIO((entry / f"{index}.bin").read_bytes()),
+        contents=[TextContent(**text) for text in page["texts"]],
+        metadata=cast(MetadataType, metadata),
+    )
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from collections.abc import Iterator
+
+__all__ = ["WorkerBudget", "get_worker_budget", "set_worker_budget"]
+
+
+class WorkerBudget:
+    """Process wide cap on the workers started by the parallel handlers.
+
+    Handlers never wait for workers: they take what is available, possibly
+    nothing, and run the rest of the work in the calling thread. Nested
+    handlers (an EML attachment that is a PDF rendered in parallel) thus
+    share the budget without oversubscribing the cores, nor deadlocking.
+    """
+
+    def __init__(self, total: int | None = None) -> None:
+        self.total = total or os.cpu_count() or 1
+        self._available = self.total
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> int:
+        return self._available
+
+    def try_acquire(self, count: int) -> int:
+        """Take up to ``count`` workers, return how many were granted."""
+        with self._lock:
+            granted = max(min(count, self._available), 0)
+            self._available -= granted
+            return granted
+
+    def release(self, count: int) -> None:
+        with self._lock:
+            self._available = min(self._available + count, self.total)
+
+    @contextmanager
+    def reserve(self, count: int) -> Iterator[int]:
+        granted = self.try_acquire(count)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+
+_budget = WorkerBudget()
+
+
+def get_worker_budget() -> WorkerBudget:
+    return _budget
+
+
+def set_worker_budget(total: int) -> None:
+    """Replace the budget, workers reserved from the previous one are kept."""
+    global _budget  # noqa: PLW0603
+    _budget = WorkerBudget(total)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, cast
+from collections.abc import Iterable
+
+from returns.result import Failure, ResultE, safe
+
+from splitter.concurrency import get_worker_budget, set_worker_budget
+from splitter.file import File, FileOrError, MetadataType
+from splitter.interfaces import IFileHandler
+from splitter.probe import DocumentProbe
+
+AttachmentData = tuple[str, str, BinaryIO]
+
+
+def get_attachment_path(att_filename: str) -> str:
+    # Replacing "/" by "-", since some attachments have "/"
+    # in their filename which the os interprets as a subdirectory
+    # Also Truncate name, to avoid OSError Errno 36: Name Too long
+    return att_filename.replace("/", "-")[:50]
+
+
+def split_attachment(
+    attachment_handler: IFileHandler,
+    att_data: AttachmentData,
+    basename: str,
+    message_metadata: MetadataType,
+) -> Iterable[FileOrError]:
+    att_filename, att_path, att_stream = att_data
+    for page in attachment_handler.split_document(att_stream, att_path):
+        yield page.bind(
+            lambda file: process_page(file, basename, message_metadata, att_filename)
+        )
+
+
+def probe_attachments(
+    attachment_handler: IFileHandler,
+    attachments: Iterable[ResultE[AttachmentData]],
+) -> list[DocumentProbe]:
+    """Probe the attachments, those that cannot be split are left out."""
+    probe = getattr(attachment_handler, "probe", None)
+    if probe is None:
+        return []
+
+    probes = []
+    for att_data in attachments:
+        if isinstance(att_data, Failure):
+            continue
+
+        _, att_path, att_stream = att_data.unwrap()
+        probe_result = cast(ResultE[DocumentProbe], probe(att_stream, att_path))
+        attachment = probe_result.value_or(None)
+        if attachment is not None:
+            probes.append(attachment)
+
+    return probes
+
+
+def split_attachments(
+    attachment_handler: IFileHandler,
+    attachments: Iterable[ResultE[AttachmentData]],
+    basename: str,
+    message_metadata: MetadataType,
+    workers: int = 0,
+) -> Iterable[FileOrError]:
+    """Split the attachments on up to ``workers`` threads or processes (> 1).
+
+    Attachments whose converter releases the GIL (the OpenCV image handlers)
+    are split on threads. Those whose converter holds it (PyMuPDF, which is
+    not thread safe either, and the EML parsers) are split in processes,
+    which receive a copy of ``attachment_handler``: when it cannot be
+    pickled (e.g. a converter with an observer holding a lock), they are
+    split in the calling thread.
+
+    Pages are yielded grouped by attachment, in the order of the message.
+    """
+    split = partial(
+        _split_attachment_result, attachment_handler, basename, message_metadata
+    )
+
+    with get_worker_budget().reserve(workers if workers > 1 else 0) as granted:
+        if granted <= 1:
+            for att_data in attachments:
+                yield from split(att_data)
+            return
+
+        executor = _AttachmentExecutor(
+            attachment_handler, basename, message_metadata, granted
+        )
+        try:
+            # Bounded window of pending attachments, consumed in order
+            pending: deque[Future[list[FileOrError]]] = deque()
+            for att_data in attachments:
+                pending.append(executor.submit(att_data))
+                if len(pending) >= granted:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown()
+
+
+class _AttachmentExecutor:
+    """Threads for the attachments whose converter releases the GIL,
+    processes for the others, at most ``workers`` of each."""
+
+    def __init__(
+        self,
+        attachment_handler: IFileHandler,
+        basename: str,
+        message_metadata: MetadataType,
+        workers: int,
+    ) -> None:
+        self.attachment_handler = attachment_handler
+        self.basename = basename
+        self.message_metadata = message_metadata
+        self.workers = workers
+        self._threads = ThreadPoolExecutor(max_workers=workers)
+        # Started with the first attachment that needs it
+        self._processes: ProcessPoolExecutor | None = None
+        self._picklable: bool | None = None
+
+    def submit(self, att_data: ResultE[AttachmentData]) -> Future[list[FileOrError]]:
+        split = partial(
+            _split_attachment_result,
+            self.attachment_handler,
+            self.basename,
+            self.message_metadata,
+        )
+        if not _holds_gil(self.attachment_handler, att_data):
+            return self._threads.submit(lambda: list(split(att_data)))
+
+        processes = self._get_processes()
+        if processes is None:
+            # In this thread, its pages are consumed after the pending ones
+            future: Future[list[FileOrError]] = Future()
+            future.set_result(list(split(att_data)))
+            return future
+
+        return processes.submit(
+            _split_in_worker, att_data.unwrap(), self.basename, self.message_metadata
+        )
+
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=True, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
+
+    def _get_processes(self) -> ProcessPoolExecutor | None:
+        if self._picklable is None:
+            self._picklable = _is_picklable(self.attachment_handler)
+
+        if self._processes is None and self._picklable:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.attachment_handler,),
+            )
+
+        return self._processes
+
+
+def _is_picklable(attachment_handler: IFileHandler) -> bool:
+    try:
+        pickle.dumps(attachment_handler)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+
+    return True
+
+
+# Each worker process receives the attachment handler once, in the initializer
+_worker_handlers: dict[str, IFileHandler] = {}
+
+
+def _init_worker(attachment_handler: IFileHandler) -> None:
+    # Nested parallel handlers (e.g. PdfHandlerParams.workers) stay in the
+    # worker, whose cores are already counted in the budget of the parent
+    set_worker_budget(1)
+    _worker_handlers["handler"] = attachment_handler
+
+
+def _split_in_worker(
+    att_data: AttachmentData, basename: str, message_metadata: MetadataType
+) -> list[FileOrError]:
+    try:
+        return list(
+            split_attachment(
+                _worker_handlers["handler"], att_data, basename, message_metadata
+            )
+        )
+    except Exception as e:  # noqa: BLE001
+        return [Failure(e)]
+
+
+def _split_attachment_result(
+    attachment_handler: IFileHandler,
+    basename: str,
+    message_metadata: MetadataType,
+    att_data: ResultE[AttachmentData],
+) -> Iterable[FileOrError]:
+    if isinstance(att_data, Failure):
+        return (att_data,)
+
+    return split_attachment(
+        attachment_handler, att_data.unwrap(), basename, message_metadata
+    )
+
+
+def _holds_gil(
+    attachment_handler: IFileHandler, att_data: ResultE[AttachmentData]
+) -> bool:
+    holds_gil = getattr(attachment_handler, "holds_gil", None)
+    if holds_gil is None or isinstance(att_data, Failure):
+        return False
+
+    _, att_path, att_stream = att_data.unwrap()
+    return bool(holds_gil(att_stream, att_path))
+
+
+@safe
+def process_page(
+    page: File, basename: str, message_metadata: MetadataType, att_filename: str
+) -> File:
+    page_filename = Path(page.vpath).name
+    page.vpath = f"{basename}-{page_filename}"
+    metadata = page.metadata or {}
+    metadata.update(message_metadata)
+    metadata.update(
+        cast(
+            MetadataType,
+            {
+                "original_filename": basename,
+                "attachment_filename": metadata.get("original_filename", att_filename),
+            },
+        )
+    )
+    return page
@@ -11,8 +11,18 @@ from returns.result import safe, ResultE, Failure
 
 from splitter import FileHandler
 from splitter.errors import ReadError
+from splitter.instrumentation import IObserver, StageTimer
 from splitter.interfaces import IExtensionHandler
 from splitter.file import File, FileOrError, MetadataType
+from splitter.eml.attachments import (
+    get_attachment_path,
+    process_page,
+    split_attachments,
+)
+from splitter.eml.stdlib_eml_handler import probe_message
+from splitter.probe import DocumentProbe
+
+__all__ = ["EmlHandler", "MessageType", "ReadEmlError", "process_page"]
 
 
 class MessageType(TypedDict):
@@ -26,20 +36,42 @@ class ReadEmlError(ReadError):
 
 
 class EmlHandler(IExtensionHandler):
+    # Parsing is pure Python, and attachments may be PDF
+    holds_gil = True
+
     def __init__(
         self,
         attachment_handler: FileHandler,
         include_cid: bool = True,
         eml_parser: EmlParser | None = None,
+        workers: int = 0,
     ) -> None:
         self.attachment_handler = attachment_handler
         self.include_cid = include_cid
+        # Split attachments on ``workers`` threads or processes (when > 1),
+        # within the process wide budget of splitter.concurrency. PDF
+        # attachments go to processes, see split_attachments
+        self.workers = workers
         self.eml_parser = eml_parser or EmlParser(
             include_raw_body=True, include_attachment_data=True
         )
+        self._observer: IObserver | None = None
+
+    @property
+    def observer(self) -> IObserver | None:
+        return self._observer
+
+    @observer.setter
+    def observer(self, observer: IObserver | None) -> None:
+        # Attachments are timed by the attachment handler
+        self._observer = observer
+        if hasattr(self.attachment_handler, "observer"):
+            self.attachment_handler.observer = observer
 
     def to_files(self, file: File) -> Iterable[FileOrError]:
-        message_result = _read_eml(self.eml_parser, file.stream.read())
+        timer = StageTimer(self._observer, file.vpath, type(self).__name__)
+        with timer("parse"):
+            message_result = _read_eml(self.eml_parser, file.stream.read())
         if isinstance(message_result, Failure):
             yield message_result
             return
@@ -55,48 +87,19 @@ class EmlHandler(IExtensionHandler):
         )
 
         basename = Path(file.vpath).name
-        for file_data in _get_attachments(message, self.include_cid):
-            if isinstance(file_data, Failure):
-                yield file_data
-                continue
-
-            yield from self._split_attachment(
-                file_data.unwrap(), basename, message_metadata
-            )
-
-    def _split_attachment(
-        self,
-        att_data: tuple[str, str, BinaryIO],
-        basename: str,
-        message_metadata: MetadataType,
-    ) -> Iterable[FileOrError]:
-        att_filename, att_path, att_stream = att_data
-        for page in self.attachment_handler.split_document(att_stream, att_path):
-            yield page.bind(
-                lambda file: process_page(
-                    file, basename, message_metadata, att_filename
-                )
-            )
-
-
-@safe
-def process_page(
-    page: File, basename: str, message_metadata: MetadataType, att_filename: str
-) -> File:
-    page_filename = Path(page.vpath).name
-    page.vpath = f"{basename}-{page_filename}"
-    metadata = page.metadata or {}
-    metadata.update(message_metadata)
-    metadata.update(
-        cast(
-            MetadataType,
-            {
-                "original_filename": basename,
-                "attachment_filename": metadata.get("original_filename", att_filename),
-            },
+        yield from split_attachments(
+            self.attachment_handler,
+            _get_attachments(message, self.include_cid),
+            basename,
+            message_metadata,
+            self.workers,
         )
-    )
-    return page
+
+    def probe(self, file: File) -> ResultE[DocumentProbe]:
+        """Probe the attachments with the attachment handler."""
+        # eml_parser base64 encodes every attachment: the standard library
+        # parser only decodes those that are probed
+        return probe_message(file, self.attachment_handler, self.include_cid)
 
 
 @safe(exceptions=(ReadEmlError,))
@@ -133,10 +136,7 @@ def _get_attachments(
 def _get_single_attachment(
     attachment: MutableMapping[str, str], att_filename: str
 ) -> tuple[str, str, BinaryIO]:
-    # Replacing "/" by "-", since some attachments have "/"
-    # in their filename which the os interprets as a subdirectory
-    # Also Truncate name, to avoid OSError Errno 36: Name Too long
-    att_filename = att_filename.replace("/", "-")[:50]
+    att_filename = get_attachment_path(att_filename)
     to_decode = attachment.pop("raw")
     att_stream = io.BytesIO(base64.b64decode(to_decode))
 
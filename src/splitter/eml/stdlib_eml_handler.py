@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import io
+import email.policy
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesFeedParser
+from email.utils import getaddresses, parseaddr
+from pathlib import Path
+from typing import BinaryIO, cast
+from collections.abc import Iterable, Iterator
+
+from returns.result import safe, ResultE, Failure
+
+from splitter.eml.attachments import (
+    AttachmentData,
+    get_attachment_path,
+    probe_attachments,
+    split_attachments,
+)
+from splitter.errors import ReadError
+from splitter.file import File, FileOrError, MetadataType
+from splitter.instrumentation import IObserver, StageTimer
+from splitter.interfaces import IExtensionHandler, IFileHandler
+from splitter.probe import DocumentProbe, get_stream_size
+
+_CHUNK_SIZE = 1 << 16
+
+
+class ReadMessageError(ReadError):
+    pass
+
+
+class StdlibEmlHandler(IExtensionHandler):
+    """EML handler based on the standard library email parser.
+
+    Unlike EmlHandler, attachments are not base64 encoded into a dict: MIME
+    parts are walked one by one and only the payloads that are split get
+    decoded, inline (cid) images being excluded beforehand.
+    """
+
+    # Parsing is pure Python, and attachments may be PDF
+    holds_gil = True
+
+    def __init__(
+        self,
+        attachment_handler: IFileHandler,
+        include_cid: bool = True,
+        workers: int = 0,
+    ) -> None:
+        self.attachment_handler = attachment_handler
+        self.include_cid = include_cid
+        self.workers = workers
+        self._observer: IObserver | None = None
+
+    @property
+    def observer(self) -> IObserver | None:
+        return self._observer
+
+    @observer.setter
+    def observer(self, observer: IObserver | None) -> None:
+        # Attachments are timed by the attachment handler
+        self._observer = observer
+        if hasattr(self.attachment_handler, "observer"):
+            self.attachment_handler.observer = observer
+
+    def to_files(self, file: File) -> Iterable[FileOrError]:
+        timer = StageTimer(self._observer, file.vpath, type(self).__name__)
+        with timer("parse"):
+            message_result = _read_message(file.stream)
+        if isinstance(message_result, Failure):
+            yield message_result
+            return
+
+        message = message_result.unwrap()
+        message_metadata = _get_message_metadata(message)
+
+        basename = Path(file.vpath).name
+        yield from split_attachments(
+            self.attachment_handler,
+            _get_attachments(message, self.include_cid),
+            basename,
+            message_metadata,
+            self.workers,
+        )
+
+    def probe(self, file: File) -> ResultE[DocumentProbe]:
+        """Probe the attachments with the attachment handler."""
+        return probe_message(file, self.attachment_handler, self.include_cid)
+
+
+def probe_message(
+    file: File, attachment_handler: IFileHandler, include_cid: bool = True
+) -> ResultE[DocumentProbe]:
+    size = get_stream_size(file.stream)
+
+    def _probe(message: Message) -> DocumentProbe:
+        attachments = probe_attachments(
+            attachment_handler, _get_attachments(message, include_cid)
+        )
+        return DocumentProbe(
+            Path(file.vpath).name,
+            "message/rfc822",
+            size,
+            total_pages=sum(attachment.total_pages for attachment in attachments),
+            attachments=attachments,
+        )
+
+    return _read_message(file.stream).map(_probe)
+
+
+@safe(exceptions=(ReadMessageError,))
+def _read_message(file_stream: BinaryIO) -> Message:
+    parser = BytesFeedParser(policy=email.policy.compat32)
+    try:
+        for chunk in iter(lambda: file_stream.read(_CHUNK_SIZE), b""):
+            parser.feed(chunk)
+        return parser.close()
+    except Exception as e:
+        raise ReadMessageError(f"Error parsing EML: {e}") from e
+
+
+def _get_message_metadata(message: Message) -> MetadataType:
+    """Read subject, from, to and cc like eml_parser does."""
+    metadata: dict[str, str | list[str]] = {
+        "subject": _decode_header(message.get("subject", "")),
+    }
+
+    from_header = _decode_header(message.get("from", "")).lower()
+    if from_header:
+        metadata["from"] = parseaddr(from_header)[1] or from_header
+
+    for name in ("to", "cc"):
+        addresses = [
+            address.lower()
+            for _, address in getaddresses(message.get_all(name, []))
+            if address
+        ]
+        if addresses or name == "to":
+            metadata[name] = addresses
+
+    return cast(MetadataType, metadata)
+
+
+def _decode_header(value: str) -> str:
+    try:
+        return str(make_header(decode_header(value)))
+    except (LookupError, ValueError):
+        return str(value)
+
+
+def _get_attachments(
+    message: Message, include_cid: bool = False
+) -> Iterator[ResultE[AttachmentData]]:
+    # Only the html bodies are decoded to find the embedded images
+    html_bodies = [] if include_cid else _get_html_bodies(message)
+
+    for index, part in enumerate(message.walk()):
+        if part.is_multipart():
+            continue
+
+        att_filename = _get_part_filename(part, index)
+        if att_filename is None:
+            continue
+
+        # Exclude embedded images (or at least try), before decoding them
+        if html_bodies and _is_embedded(part, att_filename, html_bodies):
+            continue
+
+        yield _get_single_attachment(part, att_filename)
+
+
+def _get_html_bodies(message: Message) -> list[str]:
+    return [
+        _decode_text(part)
+        for part in message.walk()
+        if part.get_content_type() == "text/html" and part.get_filename() is None
+    ]
+
+
+def _get_part_filename(part: Message, index: int) -> str | None:
+    filename = part.get_filename()
+    if filename is not None:
+        return _decode_header(filename)
+
+    if part.get_content_disposition() == "attachment":
+        return f"part-{index:03d}"
+
+    return None
+
+
+def _is_embedded(part: Message, att_filename: str, html_bodies: list[str]) -> bool:
+    references = [f"cid:{att_filename}"]
+    content_id = part.get("content-id")
+    if content_id:
+        references.append(f"cid:{str(content_id).strip().strip('<>')}")
+
+    return any(reference in body for body in html_bodies for reference in references)
+
+
+def _decode_text(part: Message) -> str:
+    payload = cast(bytes, part.get_payload(decode=True) or b"")
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+@safe
+def _get_single_attachment(part: Message, att_filename: str) -> AttachmentData:
+    payload = cast(bytes, part.get_payload(decode=True) or b"")
+
+    return (
+        att_filename,
+        get_attachment_path(att_filename),
+        io.BytesIO(payload),
+    )
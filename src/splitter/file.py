@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from io import BytesIO
 from pathlib import Path
 from typing import Literal, TypeAlias, TypedDict, BinaryIO, Any, cast
@@ -5,6 +6,8 @@ from dataclasses import dataclass, field
 
 from returns.result import ResultE, safe
 
+from splitter.stream import LazyStream
+
 
 @dataclass
 class TextContent:
@@ -44,6 +47,13 @@ class File:
             content for content in self.contents if isinstance(content, TextContent)
         ]
 
+    def release(self) -> None:
+        """Drop the file bytes and the decoded images, keeping text contents."""
+        self.stream.close()
+        self.contents = [
+            content for content in self.contents if isinstance(content, TextContent)
+        ]
+
     def __repr__(self) -> str:
         class_name = type(self).__name__
         params = [
@@ -60,13 +70,21 @@ class File:
 @safe
 def build_file(
     filepath: str,
-    file_bytes: bytes | None,
+    file_bytes: bytes | Callable[[], bytes] | BinaryIO | None,
     contents: list[FileContent] | None = None,
     metadata: MetadataType | None = None,
 ) -> File:
+    # A callable is only called when the stream is first read, streams
+    # (e.g. mapped shared memory) are used as is
+    if callable(file_bytes):
+        stream = cast(BinaryIO, LazyStream(file_bytes))
+    elif file_bytes is None or isinstance(file_bytes, bytes):
+        stream = BytesIO(file_bytes or b"")
+    else:
+        stream = file_bytes
     return File(
         Path(filepath).name,
         metadata=metadata or {},
         contents=contents or [],
-        stream=BytesIO(file_bytes or b""),
+        stream=stream,
     )
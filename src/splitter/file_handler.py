@@ -1,35 +1,105 @@
 from __future__ import annotations
 
 import io
+import asyncio
+import inspect
+import weakref
+from concurrent.futures import Executor
+from dataclasses import dataclass, replace
+from functools import cache, cached_property
 from pathlib import Path
-from typing import BinaryIO, cast
-from collections.abc import Iterable, Container
-
-from returns.result import Failure, Success, safe
-
-from splitter.interfaces import IExtensionHandler, IFileHandler
+from typing import Any, BinaryIO, TypeGuard, cast
+from collections.abc import AsyncIterator, Hashable, Iterable, Iterator, Mapping
+
+from returns.result import Failure, ResultE, Success, safe
+
+from splitter.aio import iterate_in_executor
+from splitter.cache import SplitCache
+from splitter.instrumentation import IObserver, StageTimer
+from splitter.interfaces import (
+    IExtensionHandler,
+    IFileHandler,
+    IPagesExtensionHandler,
+)
 from splitter.mime_reader import IMimeReader, MimeReader
+from splitter.pages import PageSelection, PagesType, select_pages
 from splitter.file import File, FileOrError, MetadataType
+from splitter.pool import FileInfo, PoolParams, split_many
+from splitter.probe import DocumentProbe, PageProbe, get_stream_size
+from splitter.stream import MappedStream, as_peekable
 
-__all__ = ["FileHandler", "UnsupportedFormatError", "to_handler"]
+__all__ = ["FileDetection", "FileHandler", "UnsupportedFormatError", "to_handler"]
 
 
 class UnsupportedFormatError(Exception):
     pass
 
 
+@dataclass
+class FileDetection:
+    """Type of a file, its MIME type is read at most once, when needed."""
+
+    file: File
+    mime_reader: IMimeReader
+
+    @property
+    def extension(self) -> str:
+        return get_file_extension(self.file.vpath)
+
+    @cached_property
+    def mime_type(self) -> str:
+        return self.mime_reader.get_mime_type(self.file.vpath, self.file.stream)
+
+
 class FileHandler(IFileHandler):
     def __init__(
         self,
         mime_reader: IMimeReader | None = None,
         target_extensions: Iterable[str] | None = None,
         target_mime_types: Iterable[str] | None = None,
+        max_concurrency: int = 4,
+        cache: SplitCache | None = None,
     ) -> None:
         self._target_extensions = set(target_extensions or {})
         self._target_mime_types = set(target_mime_types or {})
         self._mime_reader = mime_reader or MimeReader()
         self._converters: dict[str, IExtensionHandler] = {}
         self._mime_converters: dict[str, IExtensionHandler] = {}
+        self._cache = cache
+        self._observer: IObserver | None = None
+
+        # Executor steps running at once for all the asplit_document calls
+        self.max_concurrency = max_concurrency
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Sent to worker processes (e.g. EML attachments): event loops and
+        # observers only exist in this process
+        state = vars(self).copy()
+        state["_semaphores"] = None
+        state["_observer"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        vars(self).update(state)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def observer(self) -> IObserver | None:
+        """Receives the timed stages of the documents split by this handler.
+
+        The observer is forwarded to the registered converters that have an
+        ``observer`` attribute.
+        """
+        return self._observer
+
+    @observer.setter
+    def observer(self, observer: IObserver | None) -> None:
+        self._observer = observer
+        for handler in [*self._converters.values(), *self._mime_converters.values()]:
+            _set_observer(handler, observer)
 
     @property
     def supported_extensions(self) -> set[str]:
@@ -43,23 +113,61 @@ class FileHandler(IFileHandler):
         self,
         file_info: File | str | Path | BinaryIO | bytes,
         filename: str | None = None,
+        pages: PagesType = None,
     ) -> Iterable[FileOrError]:
-        file_or_error = _get_file(file_info, filename)
+        """Split a document into pages, or only the selected ``pages``.
+
+        ``pages`` is a PageSelection, its text form ("1:3,-1": 1-based and
+        inclusive) or Python indices and slices. Converters that accept a
+        ``pages`` argument skip the other pages, the pages of the others are
+        filtered.
+        """
+        selection = PageSelection.of(pages)
+        timer = StageTimer(self._observer, filename, type(self).__name__)
+        with timer("read"):
+            file_or_error = _get_file(file_info, filename)
 
         if isinstance(file_or_error, Failure):
             return (file_or_error,)
 
+        detection = FileDetection(file_or_error.unwrap(), self._mime_reader)
+        timer.document = detection.file.vpath
+
+        with timer("detect"):
+            is_supported = self._is_supported(detection)
+
+        if not is_supported:
+            return (Failure(_unsupported_format(detection)),)
+
+        return self.__convert(detection, selection)
+
+    def probe(
+        self,
+        file_info: File | str | Path | BinaryIO | bytes,
+        filename: str | None = None,
+    ) -> ResultE[DocumentProbe]:
+        """Read the pages of a document and the cost of splitting it.
+
+        Only headers, cross-reference tables and page trees are read: nothing
+        is rendered nor decoded. The stream is left at its position.
+        """
+        file_or_error = _get_file(file_info, filename)
+        if isinstance(file_or_error, Failure):
+            return file_or_error
+
         file = file_or_error.unwrap()
+        if not file.stream.seekable():
+            file = replace(file, stream=io.BytesIO(file.stream.read()))
 
-        if not self.is_supported(file):
-            extension = get_file_extension(file.vpath)
-            mime_type = self._mime_reader.get_mime_type(file.vpath, file.stream)
-            exception = UnsupportedFormatError(
-                f"Unknown File extension: {extension} / mime type: {mime_type}"
-            )
-            return (Failure(exception),)
+        detection = FileDetection(file, self._mime_reader)
+        if not self._is_supported(detection):
+            return Failure(_unsupported_format(detection))
 
-        return self.__convert(file)
+        position = file.stream.tell()
+        try:
+            return self.__probe(detection)
+        finally:
+            file.stream.seek(position)
 
     def is_supported(
         self,
@@ -68,10 +176,64 @@ class FileHandler(IFileHandler):
     ) -> bool:
         file = _get_file(file_info, filename).unwrap()
 
-        return _check_filename(
-            self.supported_extensions, file.vpath
-        ) or _check_mime_type(
-            self._mime_reader, self.supported_mime_types, file.vpath, file.stream
+        return self._is_supported(FileDetection(file, self._mime_reader))
+
+    def holds_gil(
+        self,
+        file_info: File | str | Path | BinaryIO | bytes,
+        filename: str | None = None,
+    ) -> bool:
+        """Whether the converter of the document holds the GIL while splitting.
+
+        Splitting such documents (e.g. PDF, with PyMuPDF) on several threads
+        does not run in parallel: use processes instead.
+        """
+        file = _get_file(file_info, filename).value_or(None)
+        if file is None:
+            return False
+
+        converter = self.__get_converter(FileDetection(file, self._mime_reader))
+        return bool(getattr(converter, "holds_gil", False))
+
+    def split_many(
+        self,
+        inputs: Iterable[FileInfo] | Mapping[Hashable, FileInfo],
+        workers: int = 4,
+        ordered: bool = True,
+        params: PoolParams | None = None,
+    ) -> Iterator[tuple[Hashable, FileOrError]]:
+        """Split several documents concurrently.
+
+        Yield ``(input_id, page)`` pairs, grouped by document in the order of
+        ``inputs`` when ``ordered``, as soon as they are produced otherwise.
+        """
+        return split_many(self, inputs, workers, ordered, params or PoolParams())
+
+    def asplit_document(
+        self,
+        file_info: File | str | Path | BinaryIO | bytes,
+        filename: str | None = None,
+        executor: Executor | None = None,
+        pages: PagesType = None,
+    ) -> AsyncIterator[FileOrError]:
+        """Split the document in the executor, yielding pages asynchronously.
+
+        Closing the iterator (or cancelling the task iterating over it) stops
+        the conversion and closes the underlying document.
+        """
+        semaphore = self._semaphores.setdefault(
+            asyncio.get_running_loop(), asyncio.Semaphore(self.max_concurrency)
+        )
+        return iterate_in_executor(
+            lambda: self.split_document(file_info, filename, pages),
+            executor,
+            semaphore,
+        )
+
+    def _is_supported(self, detection: FileDetection) -> bool:
+        return (
+            detection.extension in self.supported_extensions
+            or detection.mime_type in self.supported_mime_types
         )
 
     def register_converter(
@@ -86,21 +248,57 @@ class FileHandler(IFileHandler):
         for mime_type in mime_types or ():
             self._mime_converters[mime_type] = handler
 
-    def __get_converter(
-        self, path: str, file_stream: BinaryIO
-    ) -> IExtensionHandler | None:
-        extension = get_file_extension(path)
-        if extension in self._converters:
-            return self._converters[extension]
+        if self._observer is not None:
+            _set_observer(handler, self._observer)
+
+    def __get_converter(self, detection: FileDetection) -> IExtensionHandler | None:
+        if detection.extension in self._converters:
+            return self._converters[detection.extension]
+
+        return self._mime_converters.get(detection.mime_type, None)
+
+    def __probe(self, detection: FileDetection) -> ResultE[DocumentProbe]:
+        converter = self.__get_converter(detection)
+        if converter is None:
+            # Returned as is, as a single page
+            return Success(
+                DocumentProbe(
+                    Path(detection.file.vpath).name,
+                    detection.mime_type,
+                    get_stream_size(detection.file.stream),
+                    total_pages=1,
+                    pages=[PageProbe(0, 0)],
+                )
+            )
+
+        probe = getattr(converter, "probe", None)
+        if probe is None:
+            return Failure(
+                UnsupportedFormatError(f"{type(converter).__name__} cannot probe")
+            )
 
-        mime_type = self._mime_reader.get_mime_type(path, file_stream)
-        return self._mime_converters.get(mime_type, None)
+        return cast(ResultE[DocumentProbe], probe(detection.file))
 
     def __convert(
         self,
-        file: File,
+        detection: FileDetection,
+        selection: PageSelection | None = None,
     ) -> Iterable[FileOrError]:
-        converter = self.__get_converter(file.vpath, file.stream)
+        file = detection.file
+        converter = self.__get_converter(detection)
+        if converter and selection is not None and _accepts_pages(converter):
+            # The cache only holds whole documents
+            return converter.to_files(file, pages=selection)
+
+        pages = self.__split(file, converter)
+        return pages if selection is None else select_pages(pages, selection)
+
+    def __split(
+        self, file: File, converter: IExtensionHandler | None
+    ) -> Iterable[FileOrError]:
+        if converter and self._cache is not None:
+            return self._cache.split(file, converter)
+
         if converter:
             return converter.to_files(file)
 
@@ -136,39 +334,49 @@ def to_handler(
     return handler
 
 
-def get_file_extension(filename: str | Path) -> str:
-    return Path(filename).suffix.lower()
+@cache
+def _to_files_parameters(converter_type: type[IExtensionHandler]) -> frozenset[str]:
+    return frozenset(inspect.signature(converter_type.to_files).parameters)
+
+
+def _accepts_pages(converter: IExtensionHandler) -> TypeGuard[IPagesExtensionHandler]:
+    """Whether the converter can skip the pages left out of a selection."""
+    return "pages" in _to_files_parameters(type(converter))
+
 
+def _unsupported_format(detection: FileDetection) -> UnsupportedFormatError:
+    return UnsupportedFormatError(
+        f"Unknown File extension: {detection.extension} / "
+        f"mime type: {detection.mime_type}"
+    )
 
-def _check_filename(supported_extensions: Container[str], filename: str) -> bool:
-    return get_file_extension(filename) in supported_extensions
 
+def _set_observer(handler: IExtensionHandler, observer: IObserver | None) -> None:
+    if hasattr(handler, "observer"):
+        handler.observer = observer
 
-def _check_mime_type(
-    mime_reader: IMimeReader,
-    supported_mime_types: Container[str],
-    filepath: str,
-    file_stream: BinaryIO,
-) -> bool:
-    return mime_reader.get_mime_type(filepath, file_stream) in supported_mime_types
+
+def get_file_extension(filename: str | Path) -> str:
+    return Path(filename).suffix.lower()
 
 
 @safe
 def _get_file(
     file_info: File | str | Path | BinaryIO | bytes, filename: str | None = None
 ) -> File:
+    # The File of the caller is left untouched
     if isinstance(file_info, File):
-        return file_info
+        return replace(file_info, stream=as_peekable(file_info.stream))
 
     if isinstance(file_info, Path):
         file_info = str(file_info)
 
-    vpath = file_info if isinstance(file_info, str) else filename
+    # Files are memory-mapped rather than read whole
     if isinstance(file_info, str):
-        file_info = Path(file_info).read_bytes()
+        return File(vpath=file_info, stream=cast(BinaryIO, MappedStream(file_info)))
 
-    if vpath is None:
+    if filename is None:
         raise ValueError("Filename must be provided if file_info is not a File object")
 
     file_stream = io.BytesIO(file_info) if isinstance(file_info, bytes) else file_info
-    return File(vpath=vpath, stream=file_stream)
+    return File(vpath=filename, stream=as_peekable(file_stream))
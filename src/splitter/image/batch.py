@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, TypedDict, cast
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+from splitter.file import File, FileOrError, ImageContent, MetadataType
+from splitter.image.image import letterbox
+from splitter.stream import read_buffer
+
+if TYPE_CHECKING:
+    from cv2.typing import MatLike
+
+__all__ = ["Batch", "BatchParams", "BatchSink", "LetterboxMetadataType"]
+
+
+class LetterboxMetadataType(TypedDict):
+    # Page pixels to batch pixels: x_batch = x_page * scale + offset_x
+    letterbox_scale: float
+    letterbox_offset_x: int
+    letterbox_offset_y: int
+
+
+@dataclass
+class BatchParams:
+    batch_size: int = 8
+    width: int = 1024
+    height: int = 1024
+    # 3: BGR, as the ImageContent arrays, 1: grayscale
+    channels: Literal[1, 3] = 3
+    pad_value: int = 0
+    # Batches kept valid at once: a batch is overwritten once ``buffers``
+    # more batches are filled
+    buffers: int = 2
+
+
+@dataclass(frozen=True)
+class Batch:
+    # (pages, height, width, channels) uint8 view on a buffer of the sink
+    images: npt.NDArray[np.uint8]
+    # Metadata of each page, with its LetterboxMetadataType keys
+    metadata: list[MetadataType]
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+
+class BatchSink:
+    """Letterbox the split pages into fixed-shape batches for a model.
+
+    Pages are resized straight into preallocated (B, H, W, C) uint8 buffers,
+    without stacking them afterwards, and batches fill up across documents:
+
+        sink = BatchSink(BatchParams(batch_size=16, width=640, height=640))
+        for path in paths:
+            for batch in sink.add_pages(file_handler.split_document(path)):
+                model(batch.images)
+        if (batch := sink.flush()) is not None:
+            model(batch.images)
+
+    The images of a batch are only valid until ``buffers`` more batches are
+    filled: copy them to keep them longer.
+    """
+
+    def __init__(self, params: BatchParams | None = None) -> None:
+        self.params = params or BatchParams()
+        shape = (
+            self.params.batch_size,
+            self.params.height,
+            self.params.width,
+            self.params.channels,
+        )
+        self._buffers = [np.empty(shape, np.uint8) for _ in range(self.params.buffers)]
+        self._current = 0
+        self._metadata: list[MetadataType] = []
+
+    def add(self, file: File) -> Batch | None:
+        """Add a page, return the batch it filled, if any.
+
+        Raises ValueError when the page has no image (text only pages).
+        """
+        image = self._get_image(file)
+        if image is None:
+            raise ValueError(f"No image to batch in {file.vpath}")
+
+        return self._add(file, image)
+
+    def add_pages(self, pages: Iterable[FileOrError]) -> Iterator[Batch]:
+        """Add the pages of a split, yield the batches as they are filled.
+
+        Failures and pages without image are skipped: call ``add`` on each
+        page to handle them.
+        """
+        for page in pages:
+            file = page.value_or(None)
+            image = None if file is None else self._get_image(file)
+            if file is None or image is None:
+                continue
+
+            batch = self._add(file, image)
+            if batch is not None:
+                yield batch
+
+    def flush(self) -> Batch | None:
+        """Return the pages added since the last batch, None if there is none."""
+        if not self._metadata:
+            return None
+
+        batch = Batch(
+            self._buffers[self._current][: len(self._metadata)], self._metadata
+        )
+        self._current = (self._current + 1) % len(self._buffers)
+        self._metadata = []
+        return batch
+
+    def _add(self, file: File, image: MatLike) -> Batch | None:
+        buffer = self._buffers[self._current]
+        scale, offset_x, offset_y = letterbox(
+            image, buffer[len(self._metadata)], self.params.pad_value
+        )
+        letterbox_metadata: LetterboxMetadataType = {
+            "letterbox_scale": scale,
+            "letterbox_offset_x": offset_x,
+            "letterbox_offset_y": offset_y,
+        }
+        # The page metadata is updated in place
+        if file.metadata is None:
+            file.metadata = cast(MetadataType, {})
+        cast(dict[str, Any], file.metadata).update(letterbox_metadata)
+        self._metadata.append(file.metadata)
+
+        if len(self._metadata) < self.params.batch_size:
+            return None
+
+        return self.flush()
+
+    def _get_image(self, file: File) -> MatLike | None:
+        for content in file.contents:
+            if isinstance(content, ImageContent) and content.framework == "opencv":
+                return cast("MatLike", content.image)
+
+        # Pages output as bytes only (or passthrough scans): decode their stream
+        position = file.stream.tell()
+        buffer = np.frombuffer(read_buffer(file.stream), np.uint8)
+        file.stream.seek(position)
+        if not buffer.size:
+            return None
+
+        flags = cv2.IMREAD_GRAYSCALE if self.params.channels == 1 else cv2.IMREAD_COLOR
+        return cv2.imdecode(buffer, flags)
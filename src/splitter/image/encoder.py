@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Literal
+
+import cv2
+import numpy as np
+
+from splitter.file import FileContent, ImageContent
+
+if TYPE_CHECKING:
+    from cv2.typing import MatLike
+
+
+ImageFormat = Literal["png", "jpeg", "webp", "raw"]
+OutputMode = Literal["both", "bytes", "array"]
+
+_EXTENSIONS: dict[str, str] = {
+    "png": "png",
+    "jpeg": "jpg",
+    "webp": "webp",
+    "raw": "raw",
+}
+
+
+@dataclass(frozen=True)
+class ImageEncoder:
+    """How the handlers output the images they produce.
+
+    ``format`` "raw" writes the BGR pixels as is (height x width x 3 bytes).
+    ``output`` "bytes" drops the ImageContent arrays, "array" skips encoding
+    and returns empty file streams. With ``lazy``, images are only encoded
+    when the file stream is first read.
+    """
+
+    format: ImageFormat = "png"
+    # JPEG and WebP quality, from 0 to 100 (OpenCV default when None)
+    quality: int | None = None
+    # PNG compression level, from 0 to 9, and cv2.IMWRITE_PNG_STRATEGY_*
+    png_compression: int | None = None
+    png_strategy: int | None = None
+    output: OutputMode = "both"
+    lazy: bool = False
+
+    @property
+    def extension(self) -> str:
+        return _EXTENSIONS[self.format]
+
+    def file_bytes(self, image: MatLike) -> bytes | Callable[[], bytes] | None:
+        """Return the bytes for build_file, deferred when ``lazy`` is set."""
+        if self.output == "array":
+            return None
+
+        if self.lazy:
+            return partial(self._encode, image)
+
+        return self._encode(image)
+
+    def _encode(self, image: MatLike) -> bytes:
+        if self.format == "raw":
+            return np.ascontiguousarray(image).tobytes()
+
+        _, buffer = cv2.imencode(f".{self.extension}", image, self._get_params())
+        return buffer.tobytes()
+
+    def contents(self, image: MatLike) -> list[FileContent]:
+        if self.output == "bytes":
+            return []
+
+        return [ImageContent(framework="opencv", content_type="image", image=image)]
+
+    def _get_params(self) -> list[int]:
+        params: list[int] = []
+
+        if self.format == "png":
+            if self.png_compression is not None:
+                params += [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+            if self.png_strategy is not None:
+                params += [cv2.IMWRITE_PNG_STRATEGY, self.png_strategy]
+        elif self.quality is not None:
+            quality_flag = (
+                cv2.IMWRITE_JPEG_QUALITY
+                if self.format == "jpeg"
+                else cv2.IMWRITE_WEBP_QUALITY
+            )
+            params += [quality_flag, self.quality]
+
+        return params
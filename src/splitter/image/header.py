@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from collections.abc import Callable
+
+__all__ = ["ImageHeader", "read_image_header", "read_tiff_headers"]
+
+# JPEG markers without a length field (TEM, RSTn, SOI and EOI)
+_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xDA)}
+
+# Start Of Frame markers (DHT, JPG and DAC share the 0xCn range)
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Byte order, entry count, offset formats and entry size for TIFF and BigTIFF
+_TIFF_LAYOUTS = {
+    b"II*\x00": ("<", "H", "I", 12),
+    b"MM\x00*": (">", "H", "I", 12),
+    b"II+\x00": ("<", "Q", "Q", 20),
+    b"MM\x00+": (">", "Q", "Q", 20),
+}
+
+# ImageWidth and ImageLength tags, and the formats of their SHORT, LONG and
+# LONG8 values
+_TIFF_SIZE_TAGS = {256: "width", 257: "height"}
+_TIFF_VALUE_FORMATS = {3: "H", 4: "I", 16: "Q"}
+
+
+@dataclass(frozen=True)
+class ImageHeader:
+    format: str
+    width: int
+    height: int
+
+
+def read_image_header(buffer: bytes | memoryview) -> ImageHeader | None:
+    """Read the image dimensions from its header, without decoding it."""
+    try:
+        return _read_header(buffer)
+    except (struct.error, IndexError):
+        # Truncated header
+        return None
+
+
+def read_tiff_headers(buffer: bytes | memoryview) -> list[ImageHeader] | None:
+    """Read the dimensions of every page of a TIFF, from its directories."""
+    try:
+        return _read_tiff_headers(buffer)
+    except (struct.error, IndexError):
+        return None
+
+
+def _read_header(buffer: bytes | memoryview) -> ImageHeader | None:
+    signature = bytes(buffer[:8])
+    for prefix, read in _HEADER_READERS.items():
+        if signature.startswith(prefix):
+            return read(buffer)
+
+    return None
+
+
+def _read_png_header(buffer: bytes | memoryview) -> ImageHeader:
+    width, height = struct.unpack_from(">II", buffer, 16)
+    return ImageHeader("png", width, height)
+
+
+def _read_gif_header(buffer: bytes | memoryview) -> ImageHeader:
+    width, height = struct.unpack_from("<HH", buffer, 6)
+    return ImageHeader("gif", width, height)
+
+
+def _read_jpeg_header(buffer: bytes | memoryview) -> ImageHeader | None:
+    offset = 2
+    while offset < len(buffer):
+        if buffer[offset] != 0xFF:
+            return None
+
+        marker = buffer[offset + 1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+
+        if marker in _STANDALONE_MARKERS:
+            offset += 2
+            continue
+
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack_from(">HH", buffer, offset + 5)
+            return ImageHeader("jpeg", width, height)
+
+        (length,) = struct.unpack_from(">H", buffer, offset + 2)
+        offset += 2 + length
+
+    return None
+
+
+def _read_bmp_header(buffer: bytes | memoryview) -> ImageHeader:
+    (dib_size,) = struct.unpack_from("<I", buffer, 14)
+    if dib_size == 12:
+        # OS/2 bitmap
+        width, height = struct.unpack_from("<HH", buffer, 18)
+    else:
+        # Negative heights are top-down bitmaps
+        width, height = struct.unpack_from("<ii", buffer, 18)
+
+    return ImageHeader("bmp", width, abs(height))
+
+
+def _read_webp_header(buffer: bytes | memoryview) -> ImageHeader | None:
+    if bytes(buffer[8:12]) != b"WEBP":
+        return None
+
+    chunk = bytes(buffer[12:16])
+    if chunk == b"VP8 ":
+        # Lossy: 14 bits dimensions after the frame tag and start code
+        width, height = struct.unpack_from("<HH", buffer, 26)
+        return ImageHeader("webp", width & 0x3FFF, height & 0x3FFF)
+
+    if chunk == b"VP8L":
+        # Lossless: 14 bits (width - 1) then 14 bits (height - 1)
+        (bits,) = struct.unpack_from("<I", buffer, 21)
+        return ImageHeader("webp", (bits & 0x3FFF) + 1, (bits >> 14 & 0x3FFF) + 1)
+
+    if chunk == b"VP8X":
+        # Extended: 24 bits (width - 1) and (height - 1) on the canvas
+        size = bytes(buffer[24:30])
+        width = int.from_bytes(size[:3], "little") + 1
+        height = int.from_bytes(size[3:], "little") + 1
+        return ImageHeader("webp", width, height)
+
+    return None
+
+
+def _read_tiff_headers(buffer: bytes | memoryview) -> list[ImageHeader] | None:
+    layout = _TIFF_LAYOUTS.get(bytes(buffer[:4]))
+    if layout is None:
+        return None
+
+    byte_order, count_format, offset_format, entry_size = layout
+    count_size = struct.calcsize(count_format)
+    offset_size = struct.calcsize(offset_format)
+
+    (offset,) = struct.unpack_from(byte_order + offset_format, buffer, offset_size)
+    headers = []
+    visited = set()
+    while offset and offset not in visited:
+        visited.add(offset)
+        (entries,) = struct.unpack_from(byte_order + count_format, buffer, offset)
+        first_entry = offset + count_size
+        size = _read_tiff_size(buffer, byte_order, first_entry, entries, entry_size)
+        headers.append(ImageHeader("tiff", size["width"], size["height"]))
+
+        next_offset = first_entry + entries * entry_size
+        (offset,) = struct.unpack_from(byte_order + offset_format, buffer, next_offset)
+
+    return headers
+
+
+def _read_tiff_header(buffer: bytes | memoryview) -> ImageHeader | None:
+    headers = _read_tiff_headers(buffer)
+    return headers[0] if headers else None
+
+
+def _read_tiff_size(
+    buffer: bytes | memoryview,
+    byte_order: str,
+    first_entry: int,
+    entries: int,
+    entry_size: int,
+) -> dict[str, int]:
+    # Entry: tag, type, count and the value (inline for a single number)
+    value_offset = 4 + (entry_size - 4) // 2
+    size = {"width": 0, "height": 0}
+    for entry in range(first_entry, first_entry + entries * entry_size, entry_size):
+        tag, value_type = struct.unpack_from(byte_order + "HH", buffer, entry)
+        value_format = _TIFF_VALUE_FORMATS.get(value_type)
+        if tag in _TIFF_SIZE_TAGS and value_format is not None:
+            (size[_TIFF_SIZE_TAGS[tag]],) = struct.unpack_from(
+                byte_order + value_format, buffer, entry + value_offset
+            )
+
+    return size
+
+
+# Signatures of the image formats and the readers of their dimensions
+_HEADER_READERS: dict[bytes, Callable[[bytes | memoryview], ImageHeader | None]] = {
+    b"\xff\xd8": _read_jpeg_header,
+    b"\x89PNG\r\n\x1a\n": _read_png_header,
+    b"GIF87a": _read_gif_header,
+    b"GIF89a": _read_gif_header,
+    b"BM": _read_bmp_header,
+    b"RIFF": _read_webp_header,
+    **dict.fromkeys(_TIFF_LAYOUTS, _read_tiff_header),
+}
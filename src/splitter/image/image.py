@@ -4,11 +4,22 @@ from typing import cast, TYPE_CHECKING
 
 import cv2
 import numpy as np
+import numpy.typing as npt
+
+from splitter.image.header import read_image_header
 
 if TYPE_CHECKING:
     from cv2.typing import MatLike
 
 
+# libjpeg can decode directly at 1/2, 1/4 or 1/8 scale (DCT scaling)
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+
 def set_horizontal(image: MatLike) -> tuple[MatLike, int]:
     (h, w) = image.shape[:2]
     if h > w:
@@ -67,6 +78,10 @@ def image_resize(
         ratio = width / float(w)
         dim = (width, int(h * ratio))
 
+    # nothing to do if the image already has the requested size
+    if dim == (w, h):
+        return image, ratio
+
     # resize the image
     resized = cv2.resize(image, dim, interpolation=inter)
 
@@ -86,3 +101,85 @@ def normalize_size(target_img: MatLike, max_size: int | None) -> tuple[MatLike,
         target_img, ratio = image_resize(target_img, height=max_size)
 
     return target_img, ratio
+
+
+def letterbox(
+    image: MatLike, dst: MatLike, pad_value: int = 0
+) -> tuple[float, int, int]:
+    """Resize the image into ``dst``, centered, keeping its aspect ratio.
+
+    The resized image is written straight into ``dst`` (e.g. a slot of a
+    batch) and the borders are padded with ``pad_value``. Grayscale and BGRA
+    images are converted to the channels of ``dst``. Returns the resize
+    ratio and the (x, y) offset of the image in ``dst``.
+    """
+    (h, w) = image.shape[:2]
+    (dst_h, dst_w) = dst.shape[:2]
+
+    # Same dimensions as image_resize, on the side that constrains the size
+    if w * dst_h >= h * dst_w:
+        ratio = dst_w / float(w)
+        dim = (dst_w, max(int(h * ratio), 1))
+    else:
+        ratio = dst_h / float(h)
+        dim = (max(int(w * ratio), 1), dst_h)
+
+    x, y = (dst_w - dim[0]) // 2, (dst_h - dim[1]) // 2
+    dst[:y] = pad_value
+    dst[y + dim[1] :] = pad_value
+    dst[y : y + dim[1], :x] = pad_value
+    dst[y : y + dim[1], x + dim[0] :] = pad_value
+
+    inter = cv2.INTER_AREA if ratio < 1 else cv2.INTER_LINEAR
+    region = dst[y : y + dim[1], x : x + dim[0]]
+    conversion = _COLOR_CONVERSIONS.get((_channels(image), _channels(dst)))
+    if conversion is None:
+        cv2.resize(image, dim, dst=region, interpolation=inter)
+    else:
+        resized = cv2.resize(image, dim, interpolation=inter)
+        cv2.cvtColor(resized, conversion, dst=region)
+
+    return ratio, x, y
+
+
+# (image channels, destination channels): OpenCV conversion
+_COLOR_CONVERSIONS = {
+    (1, 3): cv2.COLOR_GRAY2BGR,
+    (4, 3): cv2.COLOR_BGRA2BGR,
+    (3, 1): cv2.COLOR_BGR2GRAY,
+    (4, 1): cv2.COLOR_BGRA2GRAY,
+}
+
+
+def _channels(image: MatLike) -> int:
+    return 1 if image.ndim == 2 else int(image.shape[2])
+
+
+def decode_image(
+    buffer: npt.NDArray[np.uint8],
+    max_size: int | None = None,
+    flags: int = cv2.IMREAD_ANYCOLOR,
+) -> tuple[MatLike | None, float]:
+    """Decode the image, at a reduced scale when much larger than max_size.
+
+    The reduction keeps the longest side above max_size, so that the final
+    resize of normalize_size still produces the same dimensions.
+    """
+    header = read_image_header(buffer.data) if max_size is not None else None
+    if header is None or header.format != "jpeg":
+        return cv2.imdecode(buffer, flags), 1.0
+
+    longest_side = max(header.width, header.height)
+    for denominator, reduced_flag in _REDUCED_DECODE_FLAGS:
+        if longest_side // denominator >= cast(int, max_size):
+            image = cv2.imdecode(buffer, flags | reduced_flag)
+            return image, _get_decode_ratio(image, longest_side)
+
+    return cv2.imdecode(buffer, flags), 1.0
+
+
+def _get_decode_ratio(image: MatLike | None, longest_side: int) -> float:
+    if image is None:
+        return 1.0
+
+    return float(max(image.shape[:2]) / longest_side)
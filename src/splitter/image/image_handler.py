@@ -4,13 +4,19 @@ from pathlib import Path
 from collections.abc import Iterable
 from typing import cast
 
-import cv2
 import numpy as np
+from returns.result import ResultE, safe
 
 from splitter.errors import ConvertError
 from splitter.interfaces import IExtensionHandler
-from splitter.file import File, ImageContent, build_file, FileOrError, MetadataType
-from splitter.image.image import normalize_size
+from splitter.file import File, build_file, FileOrError, MetadataType
+from splitter.image.encoder import ImageEncoder
+from splitter.image.header import read_image_header
+from splitter.image.image import decode_image, normalize_size
+from splitter.instrumentation import IObserver, StageTimer
+from splitter.pages import PageSelection
+from splitter.probe import DocumentProbe, PageProbe
+from splitter.stream import read_buffer
 
 
 class ConvertImageError(ConvertError):
@@ -18,37 +24,77 @@ class ConvertImageError(ConvertError):
 
 
 class ImageHandler(IExtensionHandler):
-    def __init__(self, max_size: int | None = None) -> None:
+    observer: IObserver | None = None
+
+    def __init__(
+        self, max_size: int | None = None, encoder: ImageEncoder | None = None
+    ) -> None:
         self.max_size = max_size
+        self.encoder = encoder or ImageEncoder()
+
+    def to_files(
+        self, file: File, pages: PageSelection | None = None
+    ) -> Iterable[FileOrError]:
+        if pages is not None and not pages.resolve(1):
+            # The image is not decoded
+            return
 
-    def to_files(self, file: File) -> Iterable[FileOrError]:
         image_path = Path(file.vpath)
         filename = image_path.name
-        image_filename = f"{filename}.png"
+        image_filename = f"{filename}.{self.encoder.extension}"
+        timer = StageTimer(self.observer, file.vpath, type(self).__name__)
 
-        # Decode Image
-        image_numpy_array = np.frombuffer(file.stream.read(), np.uint8)
-        image_cv = cv2.imdecode(image_numpy_array, cv2.IMREAD_ANYCOLOR)
+        # Decode Image (at a reduced scale for large images)
+        with timer("decode", 1):
+            image_numpy_array = np.frombuffer(read_buffer(file.stream), np.uint8)
+            image_cv, decode_ratio = decode_image(image_numpy_array, self.max_size)
 
         # Resize Image
-        image_cv, ratio = normalize_size(image_cv, self.max_size)
+        with timer("resize", 1):
+            image_cv, ratio = normalize_size(image_cv, self.max_size)
+        ratio *= decode_ratio
         height, width = image_cv.shape[:2]
 
-        yield build_file(
-            image_filename,
-            file_bytes=cv2.imencode(".png", image_cv)[1].tobytes(),
-            contents=[
-                ImageContent(framework="opencv", content_type="image", image=image_cv)
-            ],
-            metadata=cast(
-                MetadataType,
-                {
-                    "total_pages": 1,
-                    "original_filename": filename,
-                    "page_number": 1,
-                    "width": width,
-                    "height": height,
-                    "resized_ratio": ratio,
-                },
-            ),
-        )
+        with timer("encode", 1):
+            file_bytes = self.encoder.file_bytes(image_cv)
+
+        with timer("build", 1):
+            image_file = build_file(
+                image_filename,
+                file_bytes=file_bytes,
+                contents=self.encoder.contents(image_cv),
+                metadata=cast(
+                    MetadataType,
+                    {
+                        "total_pages": 1,
+                        "original_filename": filename,
+                        "page_number": 1,
+                        "width": width,
+                        "height": height,
+                        "resized_ratio": ratio,
+                    },
+                ),
+            )
+        yield image_file
+
+    def probe(self, file: File) -> ResultE[DocumentProbe]:
+        """Read the image dimensions from its header, without decoding it."""
+        return _probe_image(file)
+
+
+@safe(exceptions=(ConvertImageError,))
+def _probe_image(file: File) -> DocumentProbe:
+    buffer = read_buffer(file.stream)
+    header = read_image_header(buffer)
+    if header is None:
+        raise ConvertImageError("Error while reading the image header")
+
+    return DocumentProbe(
+        Path(file.vpath).name,
+        f"image/{header.format}",
+        len(buffer),
+        total_pages=1,
+        pages=[
+            PageProbe(header.width, header.height, pixels=header.width * header.height)
+        ],
+    )
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import TYPE_CHECKING, BinaryIO, cast
+from typing import TYPE_CHECKING, cast
 from collections.abc import Iterable
-from itertools import islice
 
 import cv2
 import numpy as np
-from returns.result import safe, Failure
+import numpy.typing as npt
+from returns.result import safe, Failure, ResultE, Success
 
 from splitter.errors import ReadError
 from splitter.interfaces import IExtensionHandler
-from splitter.file import ImageContent, build_file, FileOrError, File, MetadataType
+from splitter.file import build_file, FileOrError, File, MetadataType
+from splitter.image.encoder import ImageEncoder
+from splitter.image.header import read_tiff_headers
 from splitter.image.image import normalize_size
+from splitter.instrumentation import IObserver, StageTimer
+from splitter.pages import PageSelection
+from splitter.probe import DocumentProbe, PageProbe
+from splitter.stream import read_buffer
 
 if TYPE_CHECKING:
     from cv2.typing import MatLike
@@ -23,53 +29,149 @@ class ReadTiffError(ReadError):
 
 
 class TifHandler(IExtensionHandler):
+    observer: IObserver | None = None
+
     def __init__(
-        self, max_pages: int | None = None, max_size: int | None = None
+        self,
+        max_pages: int | None = None,
+        max_size: int | None = None,
+        encoder: ImageEncoder | None = None,
     ) -> None:
         self.max_pages = max_pages
         self.max_size = max_size
+        self.encoder = encoder or ImageEncoder()
 
-    def to_files(self, file: File) -> Iterable[FileOrError]:
+    def to_files(
+        self, file: File, pages: PageSelection | None = None
+    ) -> Iterable[FileOrError]:
         filename = Path(file.vpath).name
+        timer = StageTimer(self.observer, file.vpath, type(self).__name__)
+
+        with timer("read"):
+            buffer = np.frombuffer(read_buffer(file.stream), np.uint8)
+            total_pages_result = _count_tiff_pages(buffer)
+
+        if isinstance(total_pages_result, Failure):
+            yield total_pages_result
+            return
+
+        total_pages = total_pages_result.unwrap()
+        # At most max_pages pages, the first ones unless others are selected
+        selection = pages or PageSelection([slice(None)])
+        indices = selection.resolve(total_pages)[: self.max_pages]
+
+        images = timer.iterate(
+            "decode",
+            _read_tiff_pages(buffer, indices),
+            pages=[index + 1 for index in indices],
+        )
+        for index, image_result in zip(indices, images, strict=False):
+            if isinstance(image_result, Failure):
+                yield image_result
+                return
+
+            with timer("resize", index + 1):
+                resized_image, resized_ratio = normalize_size(
+                    image_result.unwrap(), self.max_size
+                )
+            with timer("encode", index + 1):
+                file_bytes = self.encoder.file_bytes(resized_image)
+
+            height, width = resized_image.shape[:2]
+            with timer("build", index + 1):
+                page_file = build_file(
+                    f"{filename}-{index}.{self.encoder.extension}",
+                    file_bytes=file_bytes,
+                    contents=self.encoder.contents(resized_image),
+                    metadata=cast(
+                        MetadataType,
+                        {
+                            "original_filename": filename,
+                            "page_number": index + 1,
+                            "total_pages": total_pages,
+                            "width": width,
+                            "height": height,
+                            "resized_ratio": resized_ratio,
+                        },
+                    ),
+                )
+            yield page_file
+
+    def probe(self, file: File) -> ResultE[DocumentProbe]:
+        """Read the frames dimensions from the TIFF directories, without decoding."""
+        return _probe_tiff(file, self.max_pages)
+
+
+@safe(exceptions=(ReadTiffError,))
+def _probe_tiff(file: File, max_pages: int | None) -> DocumentProbe:
+    buffer = read_buffer(file.stream)
+    headers = read_tiff_headers(buffer)
+    if not headers:
+        raise ReadTiffError("Error while reading tiff directories")
+
+    return DocumentProbe(
+        Path(file.vpath).name,
+        "image/tiff",
+        len(buffer),
+        total_pages=len(headers),
+        pages=[
+            PageProbe(header.width, header.height, pixels=header.width * header.height)
+            for header in headers[:max_pages]
+        ],
+    )
+
+
+# OpenCV >= 4.9 can decode a range of pages instead of the whole document
+_DECODE_PAGE_RANGE = "range" in (cv2.imdecodemulti.__doc__ or "")
 
-        images_result = _read_tiff(file.stream)
 
+def count_tiff_pages(buffer: bytes | memoryview) -> int:
+    """Count the pages by walking the chain of image file directories."""
+    headers = read_tiff_headers(buffer)
+    if headers is None:
+        raise ReadTiffError("Error while reading tiff directories")
+
+    return len(headers)
+
+
+@safe(exceptions=(ReadTiffError,))
+def _count_tiff_pages(buffer: npt.NDArray[np.uint8]) -> int:
+    return count_tiff_pages(buffer.data)
+
+
+def _read_tiff_pages(
+    buffer: npt.NDArray[np.uint8], indices: list[int]
+) -> Iterable[ResultE[MatLike]]:
+    if not _DECODE_PAGE_RANGE:
+        # Older OpenCV versions decode every page at once
+        images_result = _read_tiff(buffer)
         if isinstance(images_result, Failure):
             yield images_result
             return
 
-        images_cv = images_result.unwrap()
-        total_pages = len(images_cv)
-        number_images = min(self.max_pages or total_pages, total_pages)
+        images = images_result.unwrap()
+        yield from (Success(images[index]) for index in indices)
+        return
 
-        images = islice(images_cv, number_images)
-        for index, image_cv in enumerate(images):
-            image_filename = f"{filename}-{index}.png"
-            resized_image, resized_ratio = normalize_size(image_cv, self.max_size)
-            height, width = resized_image.shape[:2]
+    # Decode one page at a time, and only the pages we need
+    for index in indices:
+        yield _read_tiff_page(buffer, index)
+
+
+@safe(exceptions=(ReadTiffError,))
+def _read_tiff_page(buffer: npt.NDArray[np.uint8], index: int) -> MatLike:
+    success, images_cv = cv2.imdecodemulti(
+        buffer, cv2.IMREAD_ANYCOLOR, None, (index, index + 1)
+    )
+
+    if not success or not images_cv:
+        raise ReadTiffError("Error while converting tiff to png")
 
-            yield build_file(
-                image_filename,
-                file_bytes=cv2.imencode(".png", resized_image)[1].tobytes(),
-                contents=[ImageContent(framework="opencv", image=resized_image)],
-                metadata=cast(
-                    MetadataType,
-                    {
-                        "original_filename": filename,
-                        "page_number": index + 1,
-                        "total_pages": total_pages,
-                        "width": width,
-                        "height": height,
-                        "resized_ratio": resized_ratio,
-                    },
-                ),
-            )
+    return images_cv[0]
 
 
 @safe(exceptions=(ReadTiffError,))
-def _read_tiff(file_stream: BinaryIO) -> list[MatLike]:
-    file_bytes = file_stream.read()
-    images_numpy_array = np.frombuffer(file_bytes, np.uint8)
+def _read_tiff(images_numpy_array: npt.NDArray[np.uint8]) -> list[MatLike]:
     success, images_cv = cv2.imdecodemulti(images_numpy_array, cv2.IMREAD_ANYCOLOR)
 
     if not success:
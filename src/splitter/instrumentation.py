@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Protocol, TypeVar
+from collections.abc import Callable, Iterable, Iterator
+
+from splitter.aio import EXHAUSTED
+
+__all__ = [
+    "NO_TIMER",
+    "IObserver",
+    "StageEvent",
+    "StageStatsCollector",
+    "StageTimer",
+    "percentile",
+]
+
+
+@dataclass(frozen=True)
+class StageEvent:
+    stage: str  # detect, read, open, text, render, decode, resize, encode, build
+    duration: float  # seconds
+    document: str | None = None
+    page: int | None = None
+    handler: str | None = None
+
+
+class IObserver(Protocol):
+    def on_event(self, event: StageEvent) -> None:
+        ...
+
+
+T = TypeVar("T")
+
+# Shared and reusable: timing nothing costs a single call
+_NO_TIMING: AbstractContextManager[None] = nullcontext()
+
+
+class StageTimer:
+    """Time the stages of a document for an observer, if there is one."""
+
+    def __init__(
+        self,
+        observer: IObserver | None = None,
+        document: str | None = None,
+        handler: str | None = None,
+    ) -> None:
+        self.observer = observer
+        self.document = document
+        self.handler = handler
+
+    def __call__(
+        self, stage: str, page: int | None = None
+    ) -> AbstractContextManager[None]:
+        if self.observer is None:
+            return _NO_TIMING
+
+        return _TimedStage(
+            self.observer.on_event,
+            stage=stage,
+            document=self.document,
+            page=page,
+            handler=self.handler,
+        )
+
+    def iterate(
+        self, stage: str, iterable: Iterable[T], pages: Iterable[int] | None = None
+    ) -> Iterator[T]:
+        """Time each item produced by the iterable, tagged with its page.
+
+        Items are pages 1, 2, 3... unless their page numbers are given.
+        """
+        if self.observer is None:
+            return iter(iterable)
+
+        return self._iterate(stage, iter(iterable), pages or itertools.count(1))
+
+    def _iterate(
+        self, stage: str, iterator: Iterator[T], pages: Iterable[int]
+    ) -> Iterator[T]:
+        for page in pages:
+            with self(stage, page):
+                item = next(iterator, EXHAUSTED)
+            if item is EXHAUSTED:
+                return
+
+            yield item
+
+
+NO_TIMER = StageTimer()
+
+
+class _TimedStage(AbstractContextManager[None]):
+    def __init__(
+        self,
+        on_event: Callable[[StageEvent], None],
+        stage: str,
+        document: str | None,
+        page: int | None,
+        handler: str | None,
+    ) -> None:
+        self._on_event = on_event
+        self._tags = (stage, document, page, handler)
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        duration = time.perf_counter() - self._start
+        stage, document, page, handler = self._tags
+        self._on_event(StageEvent(stage, duration, document, page, handler))
+
+
+class StageStatsCollector:
+    """Observer aggregating the durations of each stage (in seconds)."""
+
+    def __init__(self) -> None:
+        self._durations: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def on_event(self, event: StageEvent) -> None:
+        with self._lock:
+            self._durations.setdefault(event.stage, []).append(event.duration)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            durations = {
+                stage: list(values) for stage, values in self._durations.items()
+            }
+
+        summary = {}
+        for stage, values in sorted(durations.items()):
+            values.sort()
+            summary[stage] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+
+        return summary
+
+    def to_json(self, path: str | Path | None = None) -> str:
+        """Return the summary as JSON, also written to ``path`` if given."""
+        summary = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            Path(path).write_text(summary)
+
+        return summary
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Percentile of sorted values, interpolated linearly as numpy does."""
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
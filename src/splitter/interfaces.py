@@ -5,6 +5,7 @@ from typing import BinaryIO, Protocol
 from collections.abc import Iterable
 
 from splitter.file import File, FileOrError
+from splitter.pages import PageSelection
 
 
 class IFileHandler(Protocol):
@@ -26,3 +27,12 @@ class IFileHandler(Protocol):
 class IExtensionHandler(Protocol):
     def to_files(self, file: File) -> Iterable[FileOrError]:
         ...
+
+
+class IPagesExtensionHandler(IExtensionHandler, Protocol):
+    """Converter skipping the pages left out of a selection."""
+
+    def to_files(
+        self, file: File, pages: PageSelection | None = None
+    ) -> Iterable[FileOrError]:
+        ...
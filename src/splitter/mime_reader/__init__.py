@@ -1,5 +1,6 @@
 from splitter.mime_reader.mime_reader_interface import IMimeReader
 from splitter.mime_reader.mime_reader import MimeReader
+from splitter.mime_reader.signature_mime_reader import SignatureMimeReader
 
 
-__all__ = ["IMimeReader", "MimeReader"]
+__all__ = ["IMimeReader", "MimeReader", "SignatureMimeReader"]
@@ -3,13 +3,14 @@ from typing import BinaryIO
 from magic import Magic
 
 from splitter.mime_reader.mime_reader_interface import IMimeReader
+from splitter.stream import read_header
 
 
 class MagicMimeReader(IMimeReader):
-    def __init__(self) -> None:
+    def __init__(self, header_size: int = 8192) -> None:
+        # libmagic only needs the beginning of the file to guess its type
+        self.header_size = header_size
         self.magic = Magic(mime=True)
 
     def get_mime_type(self, filepath: str, file_stream: BinaryIO) -> str:
-        file_bytes = file_stream.read()
-        file_stream.seek(0)
-        return self.magic.from_buffer(file_bytes)
+        return self.magic.from_buffer(read_header(file_stream, self.header_size))
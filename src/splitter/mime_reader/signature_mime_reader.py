@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import re
+import mimetypes
+from typing import BinaryIO
+from collections.abc import Iterable
+
+from splitter.mime_reader.mime_reader import MimeReader
+from splitter.mime_reader.mime_reader_interface import IMimeReader
+from splitter.stream import read_header
+
+try:
+    from splitter.mime_reader.magic_mime_reader import MagicMimeReader
+
+    _HAS_MAGIC = True
+except ImportError:  # python-magic is an optional dependency
+    _HAS_MAGIC = False
+
+__all__ = ["SignatureMimeReader", "match_signature"]
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+_EMAIL_HEADERS = (
+    rb"Return-Path|Received|Delivered-To|From|To|Cc|Subject|Date|Message-ID"
+    rb"|MIME-Version|Reply-To|Sender|Content-Type|DKIM-Signature"
+    rb"|Authentication-Results|ARC-[\w-]+|X-[\w-]+"
+)
+
+# Group name -> MIME type, every signature is matched at the start of the file
+_SIGNATURES = {
+    "pdf": (rb"%PDF-", "application/pdf"),
+    "tiff": (rb"II\*\x00|MM\x00\*|II\+\x00|MM\x00\+", "image/tiff"),
+    "png": (rb"\x89PNG\r\n\x1a\n", "image/png"),
+    "jpeg": (rb"\xff\xd8\xff", "image/jpeg"),
+    "gif": (rb"GIF8[79]a", "image/gif"),
+    "bmp": (rb"BM.{4}\x00{4}", "image/bmp"),
+    "webp": (rb"RIFF.{4}WEBP", "image/webp"),
+    "zip": (rb"PK\x03\x04|PK\x05\x06|PK\x07\x08", "application/zip"),
+    "ole2": (rb"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    "eml": (rb"(?i:" + _EMAIL_HEADERS + rb"):", "message/rfc822"),
+}
+
+_SIGNATURES_PATTERN = re.compile(
+    rb"\A(?:"
+    + rb"|".join(
+        rb"(?P<" + name.encode() + rb">" + pattern + rb")"
+        for name, (pattern, _) in _SIGNATURES.items()
+    )
+    + rb")",
+    re.DOTALL,
+)
+
+# Container formats: the extension tells which document they hold
+_CONTAINER_SUBTYPES = {
+    "application/zip": (
+        "application/vnd.openxmlformats-officedocument.",
+        "application/vnd.oasis.opendocument.",
+        "application/epub+zip",
+    ),
+    "application/x-ole-storage": (
+        "application/msword",
+        "application/vnd.ms-excel",
+        "application/vnd.ms-powerpoint",
+        "application/vnd.ms-outlook",
+    ),
+}
+
+
+def match_signature(header: bytes) -> str | None:
+    """Guess the MIME type from the magic number at the start of the file."""
+    match = _SIGNATURES_PATTERN.match(header)
+    if match is None or match.lastgroup is None:
+        return None
+
+    return _SIGNATURES[match.lastgroup][1]
+
+
+class SignatureMimeReader(IMimeReader):
+    """Pure python MIME reader for the formats handled by the splitter.
+
+    The MIME type is read from the first ``header_size`` bytes, then from the
+    ``fallbacks`` readers in order: the file extension and, when python-magic
+    is installed, libmagic.
+    """
+
+    def __init__(
+        self, fallbacks: Iterable[IMimeReader] | None = None, header_size: int = 64
+    ) -> None:
+        self.header_size = header_size
+        self.fallbacks = (
+            list(fallbacks) if fallbacks is not None else _get_default_fallbacks()
+        )
+
+    def get_mime_type(self, filepath: str, file_stream: BinaryIO) -> str:
+        mime_type = match_signature(read_header(file_stream, self.header_size))
+        if mime_type is not None:
+            return _get_container_subtype(mime_type, filepath)
+
+        for mime_reader in self.fallbacks:
+            mime_type = mime_reader.get_mime_type(filepath, file_stream)
+            if mime_type != DEFAULT_MIME_TYPE:
+                return mime_type
+
+        return DEFAULT_MIME_TYPE
+
+
+def _get_container_subtype(mime_type: str, filepath: str) -> str:
+    subtypes = _CONTAINER_SUBTYPES.get(mime_type)
+    if subtypes is None:
+        return mime_type
+
+    extension_mime_type = mimetypes.guess_type(filepath, strict=False)[0]
+    if extension_mime_type is not None and extension_mime_type.startswith(subtypes):
+        return extension_mime_type
+
+    return mime_type
+
+
+def _get_default_fallbacks() -> list[IMimeReader]:
+    fallbacks: list[IMimeReader] = [MimeReader()]
+    if _HAS_MAGIC:
+        fallbacks.append(MagicMimeReader())
+
+    return fallbacks
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, TypeAlias, cast
+from collections.abc import Iterable, Iterator
+
+from splitter.file import FileOrError
+
+__all__ = ["PageSelection", "PagesType", "select_pages"]
+
+# Page number, or start:stop[:step] with optional bounds, 1-based inclusive
+_ITEM_PATTERN = re.compile(r"^\s*(-?\d+)?\s*(?::\s*(-?\d+)?\s*(?::\s*(-?\d+)\s*)?)?$")
+
+
+@dataclass(frozen=True)
+class PageSelection:
+    """Pages to split, as Python indices and slices over the pages.
+
+    ``PageSelection([slice(0, 3), -1])`` selects the first three pages and
+    the last one, as does ``PageSelection.parse("1:3,-1")``. Pages are always
+    produced in the document order, once.
+    """
+
+    items: tuple[int | slice, ...]
+
+    def __init__(self, items: Iterable[int | slice]) -> None:
+        object.__setattr__(self, "items", tuple(items))
+
+    @classmethod
+    def parse(cls, text: str) -> PageSelection:
+        """Parse comma separated page numbers and ``start:stop[:step]`` ranges.
+
+        Numbers are 1-based, ranges include both bounds and negative numbers
+        count from the last page: "1:3,-1", "2:", ":-2", "1::2".
+        """
+        return cls(_parse_item(item) for item in text.split(","))
+
+    @classmethod
+    def of(cls, pages: PagesType) -> PageSelection | None:
+        if pages is None or isinstance(pages, PageSelection):
+            return pages
+
+        if isinstance(pages, str):
+            return cls.parse(pages)
+
+        if isinstance(pages, int | slice):
+            return cls([pages])
+
+        return cls(pages)
+
+    def resolve(self, total_pages: int) -> list[int]:
+        """Return the selected page indices, sorted, out of range ones ignored."""
+        indices: set[int] = set()
+        for item in self.items:
+            if isinstance(item, slice):
+                indices.update(range(total_pages)[item])
+            elif -total_pages <= item < total_pages:
+                indices.add(item % total_pages)
+
+        return sorted(indices)
+
+
+PagesType: TypeAlias = PageSelection | str | int | slice | Iterable[int | slice] | None
+
+
+def select_pages(
+    pages: Iterable[FileOrError], selection: PageSelection
+) -> Iterator[FileOrError]:
+    """Filter split pages on their page number, errors are kept.
+
+    For the converters that cannot skip pages themselves: the unselected
+    pages are still converted.
+    """
+    # Attachments of a message each have their own total of pages
+    selected: dict[int, set[int]] = {}
+    for page in pages:
+        file = page.value_or(None)
+        if file is None:
+            yield page
+            continue
+
+        metadata = cast(dict[str, Any], file.metadata or {})
+        total_pages = metadata.get("total_pages", 1)
+        if total_pages not in selected:
+            selected[total_pages] = set(selection.resolve(total_pages))
+
+        if metadata.get("page_number", 1) - 1 in selected[total_pages]:
+            yield page
+
+
+def _parse_item(item: str) -> int | slice:
+    match = _ITEM_PATTERN.match(item)
+    if match is None or not item.strip():
+        raise ValueError(f"Invalid page selection: {item!r}")
+
+    start, stop, step = (
+        None if value is None else int(value) for value in match.groups()
+    )
+    if ":" not in item:
+        return _to_index(start)
+
+    if step is not None and step <= 0:
+        raise ValueError(f"Invalid page selection, step must be positive: {item!r}")
+
+    # The stop page is included: -1 (the last page) means no bound
+    return slice(
+        None if start is None else _to_index(start),
+        None if stop is None or stop == -1 else _to_index(stop) + 1,
+        step,
+    )
+
+
+def _to_index(page: int | None) -> int:
+    if page is None or page == 0:
+        raise ValueError("Pages are numbered from 1, or from -1 for the last one")
+
+    return page - 1 if page > 0 else page
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import BinaryIO, cast, TypedDict
-from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, BinaryIO, Literal, TypeAlias, cast, TypedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
 
 import cv2
 import fitz
 import numpy as np
 from fitz import Pixmap
+from returns.result import ResultE, safe
 
 from splitter.file import (
     File,
@@ -17,12 +20,26 @@ from splitter.file import (
     FileOrError,
     MetadataType,
     TextContent,
-    ImageContent,
     FileContent,
 )
+from splitter.concurrency import get_worker_budget
 from splitter.errors import ConvertError
 from splitter.interfaces import IExtensionHandler
+from splitter.image.encoder import ImageEncoder
+from splitter.instrumentation import NO_TIMER, IObserver, StageTimer
+from splitter.pages import PageSelection
 from splitter.image.image import normalize_size
+from splitter.probe import DocumentProbe, PageProbe, get_stream_size
+from splitter.shared_memory import (
+    SharedBytes,
+    SharedMemoryWriter,
+    open_contents,
+    shared_memory_directory,
+)
+from splitter.stream import read_buffer
+
+if TYPE_CHECKING:
+    from cv2.typing import MatLike
 
 
 class PDFMetadataType(TypedDict, total=False):
@@ -33,49 +50,204 @@ class PDFMetadataType(TypedDict, total=False):
     height: int
     resized_ratio: float
     original_filename: str
+    render_dpi: float | None
+    render_passes: int
+    resized: bool
+    needs_ocr: bool
+    mime_type: str
+    passthrough: bool
+
+
+# Page bytes are a stream when mapped from shared memory
+PdfPage: TypeAlias = tuple[
+    PDFMetadataType, list[FileContent], bytes | Callable[[], bytes] | BinaryIO | None
+]
+# Pages on their way from a worker process, with shared memory blocks
+_SharedPdfPage: TypeAlias = tuple[
+    PDFMetadataType,
+    list[FileContent],
+    bytes | Callable[[], bytes] | BinaryIO | SharedBytes | None,
+]
 
 
 class ConvertPdfError(ConvertError):
     pass
 
 
+# Formats of the embedded images returned as is (fitz extension: mime type)
+_PASSTHROUGH_MIME_TYPES = {
+    "jpeg": "image/jpeg",
+    "jpx": "image/jp2",
+    "png": "image/png",
+    "tiff": "image/tiff",
+}
+_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jp2": "jp2",
+    "image/png": "png",
+    "image/tiff": "tiff",
+}
+
+
 @dataclass
 class PdfHandlerParams:
+    # "text" never renders pages: pages without enough text are flagged with
+    # needs_ocr instead. "images" renders every page without extracting text
+    extraction_mode: Literal["both", "text", "images"] = "both"
     always_extract_image: bool = True
     optimize_scans: bool = True
     dpi: int = 300
+    # Lowest resolution pages are rendered at, even when it means resizing
+    # the page afterwards to fit into ``image_max_size``
+    min_dpi: int | None = None
 
     image_size_threshold: int = 1400
     image_max_size: int = 2200
+    # Return full page scans that fit into ``image_max_size`` with their
+    # original bytes (e.g. JPEG) instead of rendering them. These pages have
+    # no ImageContent: the file stream is the image, see its mime_type
+    passthrough_scans: bool = False
     text_size_min_before_fallback_to_extract_images: int = 40
     normalize_text: bool = False
+    # fitz.TEXT_* flags of the text extraction, e.g. TEXT_PRESERVE_WHITESPACE
+    text_flags: int = 0
+    # Format and output mode (bytes, arrays or both) of the rendered pages
+    encoder: ImageEncoder = field(default_factory=ImageEncoder)
+    # Add render_dpi, render_passes and resized to the page metadata
+    render_stats: bool = False
+
+    # Render pages in ``workers`` processes (when > 1), by chunks of
+    # ``chunk_size`` pages with at most ``max_chunks_in_flight`` chunks
+    # pending at once (default: twice the number of workers)
+    workers: int = 0
+    chunk_size: int = 8
+    max_chunks_in_flight: int | None = None
+    # Send the rendered pages back from the workers through shared memory
+    # blocks instead of pickling them (POSIX only, ignored on Windows)
+    shared_memory: bool = False
 
 
 class FitzPdfHandler(IExtensionHandler):
     _exception = ConvertPdfError
+    # PyMuPDF never releases the GIL, nor supports being used from several
+    # threads: pages are rendered in parallel in processes only
+    holds_gil = True
+    # Receives the timed stages of the pages rendered in this process
+    observer: IObserver | None = None
 
     def __init__(self, params: PdfHandlerParams | None = None) -> None:
         self.params = params or PdfHandlerParams()
 
-    def to_files(self, file: File) -> Iterable[FileOrError]:
-        with self._read_pdf(file.stream) as document:
-            name = Path(file.vpath).name
-
-            for metadata, contents, image_bytes in _get_pages(document, self.params):
-                page_number = metadata["page_number"]
-                filename = f"{name}-{page_number}.png"
-                metadata["original_filename"] = name
-
-                yield build_file(
+    def to_files(
+        self, file: File, pages: PageSelection | None = None
+    ) -> Iterable[FileOrError]:
+        name = Path(file.vpath).name
+        timer = StageTimer(self.observer, file.vpath, type(self).__name__)
+
+        pdf_pages = self._iter_pages(file.stream, timer, pages)
+        for metadata, contents, image_bytes in pdf_pages:
+            page_number = metadata["page_number"]
+            extension = _EXTENSIONS.get(
+                metadata.get("mime_type", ""), self.params.encoder.extension
+            )
+            filename = f"{name}-{page_number}.{extension}"
+            metadata["original_filename"] = name
+
+            with timer("build", page_number):
+                page_file = build_file(
                     filename,
                     file_bytes=image_bytes,
                     contents=contents,
                     metadata=cast(MetadataType, metadata),
                 )
+            yield page_file
+
+    def _iter_pages(
+        self,
+        file_stream: BinaryIO,
+        timer: StageTimer = NO_TIMER,
+        selection: PageSelection | None = None,
+    ) -> Iterable[PdfPage]:
+        # Text extraction alone is not worth a process pool
+        if self.params.workers > 1 and self.params.extraction_mode != "text":
+            source = _get_source(file_stream)
+            yield from _get_pages_in_parallel(source, self.params, selection)
+            return
+
+        with timer("open"):
+            document = self._read_pdf(file_stream)
+
+        with document:
+            pages = _resolve_pages(document, selection)
+            yield from _get_pages(document, self.params, pages, timer)
+
+    def probe(self, file: File) -> ResultE[DocumentProbe]:
+        """Read the pages from the page tree, without rendering nor extracting text."""
+        return _probe_pdf(file, self.params)
 
     @staticmethod
     def _read_pdf(file_stream: BinaryIO) -> fitz.Document:
-        return fitz.open(stream=file_stream.read(), filetype="pdf")
+        # mupdf reads the files on disk directly (mapped inputs)
+        path = _get_path(file_stream)
+        if path is not None:
+            return fitz.open(path, filetype="pdf")
+
+        return fitz.open(stream=read_buffer(file_stream), filetype="pdf")
+
+
+@safe(exceptions=(ConvertPdfError,))
+def _probe_pdf(file: File, params: PdfHandlerParams) -> DocumentProbe:
+    size = get_stream_size(file.stream)
+    try:
+        document = FitzPdfHandler._read_pdf(file.stream)
+    except RuntimeError as e:
+        raise ConvertPdfError(f"Error while opening the PDF: {e}") from e
+
+    with document:
+        pages = [_probe_page(page, params) for page in document.pages()]
+
+    return DocumentProbe(
+        Path(file.vpath).name,
+        "application/pdf",
+        size,
+        total_pages=len(pages),
+        pages=pages,
+    )
+
+
+def _probe_page(page: fitz.Page, params: PdfHandlerParams) -> PageProbe:
+    # Fonts and images are listed in the page resources: the content stream
+    # is neither parsed nor rendered
+    has_text = bool(page.get_fonts())
+    images = page.get_images()
+
+    # Same criterion as _get_scan_pix, with the declared dimensions
+    scan_size = None
+    if len(images) == 1 and min(images[0][2:4]) > params.image_size_threshold:
+        scan_size = images[0][2] * images[0][3]
+
+    return PageProbe(
+        page.rect.width,
+        page.rect.height,
+        has_text=has_text,
+        is_scan=scan_size is not None,
+        pixels=_get_page_pixels(page, params, has_text, scan_size),
+    )
+
+
+def _get_page_pixels(
+    page: fitz.Page, params: PdfHandlerParams, has_text: bool, scan_size: int | None
+) -> int:
+    """Estimate the pixels rendered, assuming text layers have enough text."""
+    text_only = params.extraction_mode == "both" and not params.always_extract_image
+    if params.extraction_mode == "text" or (text_only and has_text):
+        return 0
+
+    if scan_size is not None and params.optimize_scans:
+        return scan_size
+
+    zoom = _get_page_zoom(page, params)
+    return int(page.rect.width * zoom) * int(page.rect.height * zoom)
 
 
 def convert_pixmap_to_rgb(pixmap: Pixmap) -> Pixmap:
@@ -87,6 +259,37 @@ def convert_pixmap_to_rgb(pixmap: Pixmap) -> Pixmap:
         return fitz.Pixmap(fitz.csRGB, pixmap)
 
 
+def pixmap_to_array(pixmap: Pixmap) -> MatLike:
+    """Wrap the pixmap samples as a BGR image, without a PNG round-trip."""
+    if pixmap.colorspace is not None and pixmap.colorspace.n not in (1, 3):
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+
+    # Rows may be padded: use the stride, then crop to the actual pixels
+    samples = np.frombuffer(pixmap.samples_mv, dtype=np.uint8)
+    samples = samples.reshape(pixmap.height, pixmap.stride)
+    samples = samples[:, : pixmap.width * pixmap.n]
+    samples = samples.reshape(pixmap.height, pixmap.width, pixmap.n)
+
+    colors = pixmap.n - pixmap.alpha
+    if colors == 0:
+        # Alpha only pixmap (stencil mask)
+        return cv2.cvtColor(samples, cv2.COLOR_GRAY2BGR)
+
+    code = cv2.COLOR_GRAY2BGR if colors == 1 else cv2.COLOR_RGB2BGR
+    if pixmap.alpha:
+        return cv2.cvtColor(_unmultiply_alpha(samples), code)
+
+    return cv2.cvtColor(np.ascontiguousarray(samples), code)
+
+
+def _unmultiply_alpha(samples: MatLike) -> MatLike:
+    """Undo mupdf's premultiplied alpha and drop the alpha channel."""
+    colors = samples[..., :-1].astype(np.uint16)
+    alpha = samples[..., -1:].astype(np.uint16)
+    unmultiplied = (colors * 255 + alpha // 2) // np.maximum(alpha, 1)
+    return np.where(alpha > 0, unmultiplied, 0).astype(np.uint8)
+
+
 def get_normalized_text(text: str) -> str:
     """Normalize text. This is useful for redis."""
     if len(text) == 0:
@@ -126,82 +329,66 @@ def _get_scan_pix(
     return None
 
 
+def get_render_zoom(
+    page_rect: fitz.Rect, dpi: int, max_size: int, min_dpi: int | None = None
+) -> float:
+    """Compute the zoom rendering the page directly at its final size."""
+    zoom = dpi / 72
+    longest_side = max(page_rect.width, page_rect.height)
+
+    # Speed optimization: the final resolution is computed from the page
+    # dimensions, so that the page is rasterized only once
+    if longest_side * zoom > max_size:
+        zoom = max_size / longest_side
+
+    # Very large pages (plans, posters) would be rendered at an unreadable
+    # resolution: keep a floor and resize afterwards
+    if min_dpi is not None:
+        zoom = max(zoom, min_dpi / 72)
+
+    return zoom
+
+
+def _get_page_zoom(page: fitz.Page, params: PdfHandlerParams) -> float:
+    return get_render_zoom(page.rect, params.dpi, params.image_max_size, params.min_dpi)
+
+
 def _get_pix(
     document: fitz.Document, page: fitz.Page, params: PdfHandlerParams
-) -> Pixmap:
+) -> tuple[Pixmap, float | None]:
     pix = _get_scan_pix(
         params.optimize_scans, document, page, params.image_size_threshold
     )
 
     if pix is not None:
-        return pix
+        return pix, None
 
-    dpi = params.dpi / 72
-    matrix = fitz.Matrix(dpi, dpi)
-    pix = page.get_pixmap(matrix=matrix)
-    coefficient = max(pix.width, pix.height) / params.image_max_size
+    zoom = _get_page_zoom(page, params)
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)), zoom * 72
 
-    if coefficient <= 1:
-        return pix
 
-    # Optimization gain en rapidité pour réduire la taille des images car
-    # la conversion en numpyarray est très longue
-    # plus longue que le temps de convertion de la page en 300 dpi
-    dpi = dpi / coefficient
-    matrix = fitz.Matrix(dpi, dpi)
-    return page.get_pixmap(matrix=matrix)
+def _resolve_pages(
+    document: fitz.Document, selection: PageSelection | None
+) -> Sequence[int]:
+    if selection is None:
+        return range(len(document))
 
-
-def _get_pages(
-    document: fitz.Document, params: PdfHandlerParams
-) -> Iterable[tuple[PDFMetadataType, list[FileContent], bytes | None]]:
-    max_size = params.text_size_min_before_fallback_to_extract_images
-    pages_info = _get_metadata(document, params.normalize_text, max_size)
-
-    for (page_metadata, page_content), page in zip(
-        pages_info, document.pages(), strict=True
-    ):
-        if not params.always_extract_image and page_content:
-            yield page_metadata, page_content, None
-            continue
-
-        pix = _get_pix(document, page, params=params)
-
-        # Transform ?
-        np_array = np.frombuffer(convert_pixmap_to_rgb(pix).tobytes(), np.uint8)
-        image_cv = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
-        image_cv, resized_ratio = normalize_size(image_cv, params.image_max_size)
-        height, width = image_cv.shape[:2]
-
-        page_content.append(
-            ImageContent(framework="opencv", content_type="image", image=image_cv)
-        )
-        metadata: PDFMetadataType = cast(
-            PDFMetadataType,
-            {
-                "width": width,
-                "height": height,
-                "resized_ratio": resized_ratio,
-                **page_metadata,
-            },
-        )
-        yield metadata, page_content, cv2.imencode(".png", image_cv)[1].tobytes()
+    return selection.resolve(len(document))
 
 
-def _get_metadata(
+def _get_pages(
     document: fitz.Document,
-    normalize_text: bool = False,
-    text_length_threshold: int | None = None,
-) -> Iterable[tuple[PDFMetadataType, list[FileContent]]]:
+    params: PdfHandlerParams,
+    pages: Sequence[int] | None = None,
+    timer: StageTimer = NO_TIMER,
+) -> Iterable[PdfPage]:
     total_pages = len(document)
 
-    for index in range(total_pages):
+    # Unselected pages are never loaded
+    for index in range(total_pages) if pages is None else pages:
+        # Load each page once: text, images and pixmap all come from it
         page = document[index]
-        text = page.get_textpage().extractText()
-        text_content = TextContent(
-            get_normalized_text(text) if normalize_text else text
-        )
-        metadata = cast(
+        page_metadata = cast(
             PDFMetadataType,
             {
                 "page_number": page.number + 1,
@@ -209,7 +396,250 @@ def _get_metadata(
             },
         )
 
-        if text_length_threshold is not None and len(text) <= text_length_threshold:
-            yield metadata, []
-        else:
-            yield metadata, [text_content]
+        page_content: list[FileContent] = []
+        if params.extraction_mode != "images":
+            with timer("text", index + 1):
+                text_content, enough_text = _get_page_text(page, params)
+
+            if params.extraction_mode == "text":
+                # No rendering: pages without text (scans) are flagged for OCR
+                page_metadata["needs_ocr"] = not enough_text
+                yield page_metadata, [text_content] if text_content.text else [], None
+                continue
+
+            if enough_text:
+                page_content.append(text_content)
+                if not params.always_extract_image:
+                    yield page_metadata, page_content, None
+                    continue
+
+        yield _get_image_page(page, params, page_metadata, page_content, timer)
+
+
+def _get_image_page(
+    page: fitz.Page,
+    params: PdfHandlerParams,
+    page_metadata: PDFMetadataType,
+    page_content: list[FileContent],
+    timer: StageTimer = NO_TIMER,
+) -> PdfPage:
+    if params.passthrough_scans:
+        with timer("extract", page.number + 1):
+            image = _get_passthrough_scan(page, params)
+        if image is not None:
+            return _passthrough_page(image, params, page_metadata, page_content)
+
+    return _render_page(page, params, page_metadata, page_content, timer)
+
+
+def _get_passthrough_scan(
+    page: fitz.Page, params: PdfHandlerParams
+) -> dict[str, Any] | None:
+    """Return the embedded full page scan when it can be used as is."""
+    images = page.get_images()
+    if len(images) != 1 or page.rotation != 0:
+        return None
+
+    # Same criterion as _get_scan_pix, but with the dimensions declared in
+    # the PDF: the image is not decoded
+    xref, smask, width, height = images[0][:4]
+    if smask or min(width, height) <= params.image_size_threshold:
+        return None
+    if max(width, height) > params.image_max_size:
+        return None
+
+    image = page.parent.extract_image(xref)
+    if image["ext"] not in _PASSTHROUGH_MIME_TYPES or image["colorspace"] not in (1, 3):
+        return None
+
+    return cast(dict[str, Any], image)
+
+
+def _passthrough_page(
+    image: dict[str, Any],
+    params: PdfHandlerParams,
+    page_metadata: PDFMetadataType,
+    page_content: list[FileContent],
+) -> PdfPage:
+    if params.render_stats:
+        page_metadata["render_dpi"] = None
+        page_metadata["render_passes"] = 0
+        page_metadata["resized"] = False
+
+    metadata: PDFMetadataType = cast(
+        PDFMetadataType,
+        {
+            "width": image["width"],
+            "height": image["height"],
+            "resized_ratio": 1.0,
+            "mime_type": _PASSTHROUGH_MIME_TYPES[image["ext"]],
+            "passthrough": True,
+            **page_metadata,
+        },
+    )
+    return metadata, page_content, image["image"]
+
+
+def _render_page(
+    page: fitz.Page,
+    params: PdfHandlerParams,
+    page_metadata: PDFMetadataType,
+    page_content: list[FileContent],
+    timer: StageTimer = NO_TIMER,
+) -> PdfPage:
+    page_number = page.number + 1
+    with timer("render", page_number):
+        pix, render_dpi = _get_pix(page.parent, page, params=params)
+        image_cv = pixmap_to_array(pix)
+
+    rendered_shape = image_cv.shape[:2]
+    with timer("resize", page_number):
+        image_cv, resized_ratio = normalize_size(image_cv, params.image_max_size)
+    height, width = image_cv.shape[:2]
+
+    if params.render_stats:
+        page_metadata["render_dpi"] = render_dpi
+        page_metadata["render_passes"] = 0 if render_dpi is None else 1
+        page_metadata["resized"] = rendered_shape != (height, width)
+
+    page_content.extend(params.encoder.contents(image_cv))
+    metadata: PDFMetadataType = cast(
+        PDFMetadataType,
+        {
+            "width": width,
+            "height": height,
+            "resized_ratio": resized_ratio,
+            **page_metadata,
+        },
+    )
+    with timer("encode", page_number):
+        file_bytes = params.encoder.file_bytes(image_cv)
+
+    return metadata, page_content, file_bytes
+
+
+def _get_page_text(
+    page: fitz.Page, params: PdfHandlerParams
+) -> tuple[TextContent, bool]:
+    """Extract the page text, and whether it is long enough to skip rendering."""
+    text = page.get_textpage(flags=params.text_flags).extractText()
+    text_content = TextContent(
+        get_normalized_text(text) if params.normalize_text else text
+    )
+
+    text_length_threshold = params.text_size_min_before_fallback_to_extract_images
+    enough_text = text_length_threshold is None or len(text) > text_length_threshold
+    return text_content, enough_text
+
+
+# Each worker process opens the document once, in the pool initializer
+_worker_documents: dict[str, fitz.Document] = {}
+
+
+def _get_path(file_stream: BinaryIO) -> str | None:
+    path = getattr(file_stream, "name", None)
+    if isinstance(path, str) and Path(path).is_file():
+        return path
+
+    return None
+
+
+def _get_source(file_stream: BinaryIO) -> bytes | str:
+    """Let workers open real files from disk rather than receiving a copy."""
+    return _get_path(file_stream) or file_stream.read()
+
+
+def _open_source(source: bytes | str) -> fitz.Document:
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _init_worker(source: bytes | str) -> None:
+    _worker_documents["document"] = _open_source(source)
+
+
+def _get_pages_chunk(
+    params: PdfHandlerParams, pages: Sequence[int], directory: str | None = None
+) -> list[_SharedPdfPage]:
+    pdf_pages = _get_pages(_worker_documents["document"], params, pages)
+    if directory is None:
+        return list(pdf_pages)
+
+    writer = SharedMemoryWriter(directory)
+    return [_share_page(writer, pdf_page) for pdf_page in pdf_pages]
+
+
+def _share_page(writer: SharedMemoryWriter, pdf_page: PdfPage) -> _SharedPdfPage:
+    metadata, contents, image_bytes = pdf_page
+    # Lazily encoded pages are still pickled, with their array
+    shared_bytes = (
+        writer.share_bytes(image_bytes)
+        if isinstance(image_bytes, bytes)
+        else image_bytes
+    )
+    return metadata, writer.share_contents(contents), shared_bytes
+
+
+def _open_page(pdf_page: _SharedPdfPage) -> PdfPage:
+    metadata, contents, image_bytes = pdf_page
+    if isinstance(image_bytes, SharedBytes):
+        image_bytes = image_bytes.open()
+
+    return metadata, open_contents(contents), image_bytes
+
+
+def _get_pages_in_parallel(
+    source: bytes | str,
+    params: PdfHandlerParams,
+    selection: PageSelection | None = None,
+) -> Iterator[PdfPage]:
+    with _open_source(source) as document:
+        pages = _resolve_pages(document, selection)
+
+        if len(pages) <= params.chunk_size:
+            yield from _get_pages(document, params, pages)
+            return
+
+    # Nested parallel handlers (e.g. EML attachments) share the worker budget
+    with get_worker_budget().reserve(params.workers) as workers:
+        if workers <= 1:
+            with _open_source(source) as document:
+                yield from _get_pages(document, params, pages)
+            return
+
+        yield from _get_chunks_in_processes(source, params, workers, pages)
+
+
+def _get_chunks_in_processes(
+    source: bytes | str,
+    params: PdfHandlerParams,
+    workers: int,
+    pages: Sequence[int],
+) -> Iterator[PdfPage]:
+    # Only the selected pages are sent to the workers
+    chunks = (
+        pages[start : start + params.chunk_size]
+        for start in range(0, len(pages), params.chunk_size)
+    )
+    max_in_flight = params.max_chunks_in_flight or 2 * workers
+    with shared_memory_directory(params.shared_memory) as directory:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(source,)
+        )
+
+        try:
+            # Bounded window of pending chunks, consumed in page order
+            pending: deque[Future[list[_SharedPdfPage]]] = deque()
+            for chunk in chunks:
+                pending.append(
+                    executor.submit(_get_pages_chunk, params, chunk, directory)
+                )
+                if len(pending) >= max_in_flight:
+                    yield from map(_open_page, pending.popleft().result())
+
+            while pending:
+                yield from map(_open_page, pending.popleft().result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import io
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Literal, TypeAlias
+from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping
+
+from returns.result import Failure, Success
+
+from splitter.file import File, FileOrError, ImageContent
+from splitter.shared_memory import (
+    SharedFile,
+    SharedMemoryWriter,
+    shared_memory_directory,
+)
+from splitter.stream import LazyStream, MappedStream
+
+if TYPE_CHECKING:
+    from splitter.file_handler import FileHandler
+
+__all__ = ["PoolParams", "split_many"]
+
+FileInfo: TypeAlias = File | str | Path | BinaryIO | bytes
+SplitResult: TypeAlias = tuple[Hashable, FileOrError]
+# Pages sent back by the worker processes can be in shared memory blocks
+_Page: TypeAlias = FileOrError | SharedFile
+
+
+@dataclass
+class PoolParams:
+    # Default: "process" when a handler_factory is given, "thread" otherwise.
+    # Threads only run in parallel the converters that release the GIL (the
+    # OpenCV image handlers): PyMuPDF and the EML parsers hold it, so PDF
+    # and EML documents are interleaved but never split at the same time.
+    executor: Literal["thread", "process"] | None = None
+
+    # Pages (and bytes) produced but not consumed yet, per split_many call.
+    # Worker processes send their pages one by one and wait for the budget.
+    max_pending_pages: int | None = 64
+    max_pending_bytes: int | None = None
+
+    # Build the FileHandler in each worker process: registered converters do
+    # not have to be picklable. Required by the process executor, it must be
+    # a module level function.
+    handler_factory: Callable[[], FileHandler] | None = None
+
+    # Send the pages back from the worker processes through shared memory
+    # blocks instead of pickling them (POSIX only, ignored on Windows)
+    shared_memory: bool = False
+
+
+def split_many(
+    file_handler: FileHandler,
+    inputs: Iterable[FileInfo] | Mapping[Hashable, FileInfo],
+    workers: int,
+    ordered: bool,
+    params: PoolParams,
+) -> Iterator[SplitResult]:
+    """Split documents on a pool of workers, yielding (input_id, page) pairs.
+
+    The input id is the key of ``inputs`` when it is a mapping, its index
+    otherwise. Streams and bytes inputs use their input id as filename, they
+    must be given in a mapping.
+    """
+    items = inputs.items() if isinstance(inputs, Mapping) else enumerate(inputs)
+    executor = params.executor or ("process" if params.handler_factory else "thread")
+    if executor == "process":
+        if params.handler_factory is None:
+            raise ValueError("handler_factory is required by the process executor")
+
+        return _split_in_processes(
+            items, workers, ordered, params.handler_factory, params
+        )
+
+    return _split_in_threads(file_handler, items, workers, ordered, params)
+
+
+def _get_filename(input_id: Hashable, file_info: FileInfo) -> str | None:
+    if isinstance(file_info, (File, str, Path)):
+        return None
+
+    # Their format is detected from the extension of the filename
+    if not isinstance(input_id, str):
+        raise ValueError(
+            "Bytes and stream inputs are split under their input id, which must "
+            f"be a filename: pass them in a mapping (got {input_id!r})"
+        )
+
+    return input_id
+
+
+def _get_page_size(page: FileOrError) -> int:
+    file = page.value_or(None)
+    if file is None:
+        return 0
+
+    size = 0
+    if isinstance(file.stream, io.BytesIO | MappedStream):
+        size += file.stream.getbuffer().nbytes
+    elif isinstance(file.stream, LazyStream):
+        size += file.stream.nbytes
+
+    for content in file.contents:
+        if isinstance(content, ImageContent):
+            size += getattr(content.image, "nbytes", 0)
+
+    return size
+
+
+class _Backpressure:
+    """Block producers while too many pages are waiting to be consumed.
+
+    The document being delivered (``head``) is never blocked, so that ordered
+    delivery cannot deadlock when other documents filled the budget.
+    """
+
+    def __init__(self, max_pages: int | None, max_bytes: int | None) -> None:
+        self._condition = threading.Condition()
+        self._max_pages = max_pages
+        self._max_bytes = max_bytes
+        self._pages = 0
+        self._bytes = 0
+        self.head: int | None = None
+        self.closed = False
+
+    def acquire(self, index: int, size: int) -> None:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or index == self.head or not self._is_full()
+            )
+            self._pages += 1
+            self._bytes += size
+
+    def release(self, size: int) -> None:
+        with self._condition:
+            self._pages -= 1
+            self._bytes -= size
+            self._condition.notify_all()
+
+    def set_head(self, index: int) -> None:
+        with self._condition:
+            self.head = index
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def _is_full(self) -> bool:
+        return (self._max_pages is not None and self._pages >= self._max_pages) or (
+            self._max_bytes is not None and self._bytes >= self._max_bytes
+        )
+
+
+class _PageChannel:
+    """Pages split by the workers, waiting to be consumed.
+
+    The process executor shares it with its workers through a manager, so
+    that the pending pages budget covers the pages of every process.
+    """
+
+    def __init__(self, max_pages: int | None, max_bytes: int | None) -> None:
+        self._backpressure = _Backpressure(max_pages, max_bytes)
+        # A None page marks the end of a document
+        self._pages: queue.Queue[tuple[int, _Page | None, int]] = queue.Queue()
+
+    def put(self, index: int, page: _Page, size: int) -> bool:
+        """Queue a page, return False when the consumer is gone."""
+        self._backpressure.acquire(index, size)
+        self._pages.put((index, page, size))
+        return not self._backpressure.closed
+
+    def done(self, index: int, error: Exception | None) -> None:
+        if error is not None:
+            self.put(index, Failure(error), 0)
+
+        self._pages.put((index, None, 0))
+
+    def get(self) -> tuple[int, _Page | None, int]:
+        return self._pages.get()
+
+    def release(self, size: int) -> None:
+        self._backpressure.release(size)
+
+    def set_head(self, index: int) -> None:
+        self._backpressure.set_head(index)
+
+    def close(self) -> None:
+        self._backpressure.close()
+
+
+class _ChannelManager(BaseManager):
+    PageChannel: Callable[[int | None, int | None], _PageChannel]
+
+
+_ChannelManager.register("PageChannel", _PageChannel)
+
+
+def _produce(
+    channel: _PageChannel,
+    index: int,
+    split: Callable[[], Iterable[FileOrError]],
+    writer: SharedMemoryWriter | None = None,
+) -> None:
+    for page in split():
+        size = _get_page_size(page)
+        shared = page if writer is None else page.map(writer.share_file).value_or(page)
+        if not channel.put(index, shared, size):
+            break
+
+
+class _Splitter:
+    def __init__(
+        self,
+        items: Iterable[tuple[Hashable, FileInfo]],
+        workers: int,
+        ordered: bool,
+        channel: _PageChannel,
+        submit: Callable[[int, Hashable, FileInfo], Future[None]],
+    ) -> None:
+        self._items = iter(enumerate(items))
+        self._workers = workers
+        self._ordered = ordered
+        self._channel = channel
+        self._submit_split = submit
+        self._input_ids: dict[int, Hashable] = {}
+        self._running = 0
+
+    def __iter__(self) -> Iterator[SplitResult]:
+        try:
+            self._submit()
+            if self._ordered:
+                self._channel.set_head(0)
+                yield from self._iter_ordered()
+            else:
+                yield from self._iter_completed()
+        finally:
+            self._channel.close()
+
+    def _submit(self) -> None:
+        while self._running < self._workers:
+            next_item = next(self._items, None)
+            if next_item is None:
+                return
+
+            index, (input_id, file_info) = next_item
+            self._input_ids[index] = input_id
+            self._running += 1
+            future = self._submit_split(index, input_id, file_info)
+            future.add_done_callback(partial(self._finish, index))
+
+    def _finish(self, index: int, future: Future[None]) -> None:
+        if not future.cancelled():
+            error = future.exception()
+            self._channel.done(index, error if isinstance(error, Exception) else None)
+
+    def _next_page(self) -> tuple[int, _Page | None, int]:
+        index, page, size = self._channel.get()
+        if page is None:
+            self._running -= 1
+            self._submit()
+
+        return index, page, size
+
+    def _iter_completed(self) -> Iterator[SplitResult]:
+        while self._running:
+            index, page, size = self._next_page()
+            if page is None:
+                del self._input_ids[index]
+                continue
+
+            self._channel.release(size)
+            yield self._input_ids[index], _open_page(page)
+
+    def _iter_ordered(self) -> Iterator[SplitResult]:
+        head = 0
+        # Pages of the documents after the head, waiting for their turn
+        stash: dict[int, deque[tuple[_Page | None, int]]] = {}
+        while head in self._input_ids:
+            pages = stash.setdefault(head, deque())
+            while not pages:
+                index, page, size = self._next_page()
+                stash.setdefault(index, deque()).append((page, size))
+
+            page, size = pages.popleft()
+            if page is None:
+                del stash[head], self._input_ids[head]
+                head += 1
+                self._channel.set_head(head)
+                continue
+
+            self._channel.release(size)
+            yield self._input_ids[head], _open_page(page)
+
+
+def _split_in_threads(
+    file_handler: FileHandler,
+    items: Iterable[tuple[Hashable, FileInfo]],
+    workers: int,
+    ordered: bool,
+    params: PoolParams,
+) -> Iterator[SplitResult]:
+    channel = _PageChannel(params.max_pending_pages, params.max_pending_bytes)
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(index: int, input_id: Hashable, file_info: FileInfo) -> Future[None]:
+        filename = _get_filename(input_id, file_info)
+        split = partial(file_handler.split_document, file_info, filename)
+        return executor.submit(_produce, channel, index, split)
+
+    try:
+        yield from _Splitter(items, workers, ordered, channel, submit)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Each worker process builds its own FileHandler, in the pool initializer
+_worker_handlers: dict[str, FileHandler] = {}
+_worker_writers: dict[str, SharedMemoryWriter] = {}
+
+
+def _init_worker(
+    handler_factory: Callable[[], FileHandler], directory: str | None
+) -> None:
+    _worker_handlers["handler"] = handler_factory()
+    if directory is not None:
+        _worker_writers["writer"] = SharedMemoryWriter(directory)
+
+
+def _split_in_worker(
+    channel: _PageChannel, index: int, file_info: FileInfo, filename: str | None
+) -> None:
+    split = partial(_worker_handlers["handler"].split_document, file_info, filename)
+    _produce(channel, index, split, _worker_writers.get("writer"))
+
+
+def _to_picklable(file_info: FileInfo) -> FileInfo:
+    if isinstance(file_info, File):
+        stream = io.BytesIO(file_info.stream.read())
+        return File(file_info.vpath, stream, file_info.contents, file_info.metadata)
+
+    if isinstance(file_info, (str, Path, bytes)):
+        return file_info
+
+    return file_info.read()
+
+
+def _split_in_processes(
+    items: Iterable[tuple[Hashable, FileInfo]],
+    workers: int,
+    ordered: bool,
+    handler_factory: Callable[[], FileHandler],
+    params: PoolParams,
+) -> Iterator[SplitResult]:
+    with (
+        shared_memory_directory(params.shared_memory) as directory,
+        _ChannelManager() as manager,
+    ):
+        channel = manager.PageChannel(
+            params.max_pending_pages, params.max_pending_bytes
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(handler_factory, directory),
+        )
+
+        def submit(index: int, input_id: Hashable, file_info: FileInfo) -> Future[None]:
+            return executor.submit(
+                _split_in_worker,
+                channel,
+                index,
+                _to_picklable(file_info),
+                _get_filename(input_id, file_info),
+            )
+
+        try:
+            yield from _Splitter(items, workers, ordered, channel, submit)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _open_page(page: _Page) -> FileOrError:
+    if isinstance(page, SharedFile):
+        return Success(page.open())
+
+    return page
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+__all__ = ["DocumentProbe", "PageProbe", "get_stream_size"]
+
+# Relative costs, in pages: rendering or decoding a megapixel costs about as
+# much as producing a page, reading a megabyte much less
+_MEGAPIXEL_COST = 1.0
+_MEGABYTE_COST = 0.1
+
+
+@dataclass(frozen=True)
+class PageProbe:
+    # Points for PDF pages, pixels for images
+    width: float
+    height: float
+    # Whether the page has a text layer, None for images
+    has_text: bool | None = None
+    # A single image covering the page
+    is_scan: bool = False
+    # Pixels rendered or decoded when splitting the page, 0 for text only
+    pixels: int = 0
+
+    @property
+    def cost(self) -> float:
+        return 1 + self.pixels / 1e6 * _MEGAPIXEL_COST
+
+
+@dataclass(frozen=True)
+class DocumentProbe:
+    """What splitting a document would involve, read without splitting it.
+
+    ``pages`` are the pages a split would produce, ``total_pages`` all the
+    pages (or frames) of the document. ``cost`` is a relative estimate of
+    the split duration, in pages, e.g. to schedule the largest jobs first.
+    """
+
+    filename: str
+    mime_type: str | None
+    size: int
+    total_pages: int
+    pages: list[PageProbe] = field(default_factory=list)
+    attachments: list[DocumentProbe] = field(default_factory=list)
+
+    @property
+    def cost(self) -> float:
+        return (
+            self.size / 1e6 * _MEGABYTE_COST
+            + sum(page.cost for page in self.pages)
+            + sum(attachment.cost for attachment in self.attachments)
+        )
+
+
+def get_stream_size(file_stream: BinaryIO) -> int:
+    """Count the bytes left in the stream, without consuming them."""
+    position = file_stream.tell()
+    try:
+        return file_stream.seek(0, io.SEEK_END) - position
+    finally:
+        file_stream.seek(position)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO, cast
+
+from splitter.file import File, FileContent, ImageContent, MetadataType
+from splitter.stream import MappedStream
+
+__all__ = [
+    "SharedArray",
+    "SharedBytes",
+    "SharedFile",
+    "SharedMemoryDirectory",
+    "SharedMemoryWriter",
+    "open_contents",
+    "shared_memory_directory",
+    "shared_memory_supported",
+]
+
+# Smaller buffers are cheaper to pickle than to share
+_MIN_SHARED_BYTES = 1 << 16
+
+
+def shared_memory_supported() -> bool:
+    # Blocks are unlinked while mapped, which Windows does not allow
+    return os.name == "posix"
+
+
+@dataclass(frozen=True)
+class SharedBytes:
+    """Bytes written to a shared memory block by another process."""
+
+    path: str
+
+    def open(self) -> BinaryIO:
+        """Map the block as a read only stream, without copying it.
+
+        The block is unlinked right away: it is freed once the stream and
+        the buffers taken from it are garbage collected.
+        """
+        stream = MappedStream(self.path)
+        os.unlink(self.path)
+        return cast(BinaryIO, stream)
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Array written to a shared memory block by another process."""
+
+    path: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    def open(self) -> Any:
+        """Map the block as an array, without copying it.
+
+        Pages are only copied when the array is written to (copy on write).
+        The block is freed once the array and its views are garbage collected.
+        """
+        # numpy is only imported when arrays are shared
+        import numpy as np  # noqa: PLC0415
+
+        with open(self.path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        os.unlink(self.path)
+
+        return np.frombuffer(mapping, self.dtype).reshape(self.shape)
+
+
+@dataclass(frozen=True)
+class SharedFile:
+    """File sent to another process, its buffers in shared memory blocks."""
+
+    vpath: str
+    stream: SharedBytes | bytes
+    contents: list[FileContent]
+    metadata: MetadataType | None
+
+    def open(self) -> File:
+        stream = self.stream
+        return File(
+            self.vpath,
+            stream=(
+                stream.open()
+                if isinstance(stream, SharedBytes)
+                else cast(BinaryIO, io.BytesIO(stream))
+            ),
+            contents=open_contents(self.contents),
+            metadata=self.metadata,
+        )
+
+
+class SharedMemoryDirectory(AbstractContextManager[str]):
+    """Directory of the blocks exchanged by a pool, removed on exit.
+
+    Blocks live in /dev/shm when available (a RAM backed file system),
+    in the temporary directory otherwise. Blocks that were not received,
+    e.g. from cancelled tasks, are removed with the directory.
+    """
+
+    def __init__(self) -> None:
+        parent = "/dev/shm" if Path("/dev/shm").is_dir() else None  # noqa: S108
+        self.path = tempfile.mkdtemp(prefix="splitter-shm-", dir=parent)
+
+    def __enter__(self) -> str:
+        return self.path
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SharedMemoryWriter:
+    """Write the page buffers to shared memory blocks, in worker processes."""
+
+    def __init__(self, directory: str, min_bytes: int = _MIN_SHARED_BYTES) -> None:
+        self.directory = directory
+        self.min_bytes = min_bytes
+
+    def share_bytes(self, data: bytes) -> SharedBytes | bytes:
+        if len(data) < self.min_bytes:
+            return data
+
+        return SharedBytes(self._write(data))
+
+    def share_array(self, array: Any) -> SharedArray | Any:
+        if getattr(array, "nbytes", 0) < self.min_bytes:
+            return array
+
+        data = array.data if array.flags.c_contiguous else array.tobytes()
+        return SharedArray(self._write(data), tuple(array.shape), array.dtype.str)
+
+    def share_contents(self, contents: list[FileContent]) -> list[FileContent]:
+        return [
+            replace(content, image=self.share_array(content.image))
+            if isinstance(content, ImageContent) and content.framework == "opencv"
+            else content
+            for content in contents
+        ]
+
+    def share_file(self, file: File) -> SharedFile:
+        return SharedFile(
+            file.vpath,
+            self.share_bytes(file.stream.read()),
+            self.share_contents(file.contents),
+            file.metadata,
+        )
+
+    def _write(self, data: bytes | memoryview) -> str:
+        descriptor, path = tempfile.mkstemp(dir=self.directory)
+        with open(descriptor, "wb") as file:
+            file.write(data)
+
+        return path
+
+
+def open_contents(contents: list[FileContent]) -> list[FileContent]:
+    return [
+        replace(content, image=content.image.open())
+        if isinstance(content, ImageContent) and isinstance(content.image, SharedArray)
+        else content
+        for content in contents
+    ]
+
+
+def shared_memory_directory(enabled: bool) -> AbstractContextManager[str | None]:
+    """Directory of the blocks, None when shared memory is disabled."""
+    if enabled and shared_memory_supported():
+        return SharedMemoryDirectory()
+
+    return nullcontext()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import io
+import mmap
+from collections.abc import Callable
+from pathlib import Path
+from typing import BinaryIO, cast
+
+from splitter.errors import ReadError
+
+__all__ = [
+    "LazyStream",
+    "MappedStream",
+    "PeekableStream",
+    "as_peekable",
+    "read_buffer",
+    "read_header",
+]
+
+
+class PeekableStream(io.BufferedIOBase):
+    """Wrap a non seekable stream, buffering only the bytes that were peeked."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        super().__init__()
+        self._raw = raw
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def peek(self, size: int = 1) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self._raw.read(size - len(self._buffer))
+            if not chunk:
+                break
+            self._buffer += chunk
+
+        return self._buffer
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0:
+            data, self._buffer = self._buffer + self._raw.read(), b""
+            return data
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        if len(data) < size:
+            data += self._raw.read(size - len(data))
+
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+
+class LazyStream(io.BufferedIOBase):
+    """Produce the stream bytes on first access, e.g. to defer image encoding."""
+
+    def __init__(self, factory: Callable[[], bytes]) -> None:
+        super().__init__()
+        self._factory: Callable[[], bytes] | None = factory
+        self._buffer: io.BytesIO | None = None
+
+    @property
+    def materialized(self) -> bool:
+        return self._buffer is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the produced bytes, 0 while they were not produced."""
+        return 0 if self._buffer is None else self._buffer.getbuffer().nbytes
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self._get_buffer().read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._get_buffer().read1(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._get_buffer().seek(offset, whence)
+
+    def tell(self) -> int:
+        return 0 if self._buffer is None else self._buffer.tell()
+
+    def getvalue(self) -> bytes:
+        return self._get_buffer().getvalue()
+
+    def close(self) -> None:
+        """Drop the bytes, or the factory when they were not produced yet."""
+        self._factory = None
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        super().close()
+
+    def __reduce__(self) -> tuple[type[io.BytesIO], tuple[bytes]]:
+        # Sent to another process (e.g. split_many workers) as plain bytes
+        return io.BytesIO, (self.getvalue(),)
+
+    def _get_buffer(self) -> io.BytesIO:
+        if self.closed:
+            raise ValueError("I/O operation on a released stream")
+
+        if self._buffer is None:
+            factory = cast(Callable[[], bytes], self._factory)
+            # The factory (and the image it references) is not needed any more
+            self._buffer, self._factory = io.BytesIO(factory()), None
+
+        return self._buffer
+
+
+class MappedStream(io.BufferedIOBase):
+    """Read only, memory-mapped file: reading does not load the whole file."""
+
+    def __init__(self, path: str | Path) -> None:
+        super().__init__()
+        self.name = str(path)
+        with open(path, "rb") as file:
+            # An empty file cannot be mapped
+            size = Path(path).stat().st_size
+            self._map = (
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+            )
+        self._view = memoryview(self._map if self._map is not None else b"")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def getbuffer(self) -> memoryview:
+        """Return a read only view of the whole file, without copying it."""
+        self._check_closed()
+        return self._view
+
+    def peek(self, size: int = 1) -> bytes:
+        self._check_closed()
+        return bytes(self._view[self._position : self._position + max(size, 1)])
+
+    def read(self, size: int | None = -1) -> bytes:
+        self._check_closed()
+        end = len(self._view) if size is None or size < 0 else self._position + size
+        data = bytes(self._view[self._position : end])
+        self._position += len(data)
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_closed()
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self._position}.get(
+            whence, len(self._view)
+        )
+        self._position = max(start + offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        self._check_closed()
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._view.release()
+                if self._map is not None:
+                    self._map.close()
+            except BufferError:
+                # Arrays (np.frombuffer) still use the mapping, it is
+                # unmapped when they are garbage collected
+                pass
+        super().close()
+
+    def __reduce__(self) -> tuple[type[io.BytesIO], tuple[bytes]]:
+        # Mappings cannot be pickled: sent to another process as plain bytes
+        self._check_closed()
+        return io.BytesIO, (bytes(self._view),)
+
+    def _check_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+
+
+def read_buffer(file_stream: BinaryIO) -> bytes | memoryview:
+    """Read the rest of the stream, without copying in memory or mapped files."""
+    getbuffer = getattr(file_stream, "getbuffer", None)
+    if getbuffer is None or not file_stream.seekable():
+        return file_stream.read()
+
+    position = file_stream.tell()
+    file_stream.seek(0, io.SEEK_END)
+    return cast(memoryview, getbuffer())[position:]
+
+
+def read_header(file_stream: BinaryIO, size: int) -> bytes:
+    """Read up to size bytes from the current position, without consuming them."""
+    if file_stream.seekable():
+        position = file_stream.tell()
+        try:
+            return file_stream.read(size)
+        finally:
+            file_stream.seek(position)
+
+    peek = getattr(file_stream, "peek", None)
+    if peek is None:
+        raise ReadError(
+            "Cannot read the header of a non seekable stream, wrap it in a "
+            "PeekableStream"
+        )
+
+    return bytes(peek(size)[:size])
+
+
+def as_peekable(file_stream: BinaryIO) -> BinaryIO:
+    """Make sure the header of the stream can be read more than once."""
+    if file_stream.seekable() or hasattr(file_stream, "peek"):
+        return file_stream
+
+    return cast(BinaryIO, PeekableStream(file_stream))
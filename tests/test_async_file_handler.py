@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from io import BytesIO
+from pathlib import Path
+from collections.abc import Iterable
+
+from splitter import File, FileOrError
+from splitter.file import build_file
+from splitter.file_handler import FileHandler
+from splitter.mime_reader import MimeReader
+from splitter.pdf.pdf_handler import FitzPdfHandler
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class SlowHandler:
+    def __init__(self) -> None:
+        self.closed = False
+        self.pages = 0
+
+    def to_files(self, file: File) -> Iterable[FileOrError]:
+        try:
+            for page_number in range(1, 100):
+                time.sleep(0.01)
+                self.pages += 1
+                yield build_file(f"{file.vpath}-{page_number}", b"")
+        finally:
+            self.closed = True
+
+
+class TestAsyncFileHandler(unittest.TestCase):
+    def test_asplit_document(self) -> None:
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+        file_path = BASE_PATH / "specimen.pdf"
+
+        async def split() -> list[FileOrError]:
+            return [page async for page in file_handler.asplit_document(file_path)]
+
+        results = asyncio.run(split())
+        expected = list(file_handler.split_document(file_path))
+
+        self.assertEqual(
+            [page.unwrap().metadata for page in expected],
+            [page.unwrap().metadata for page in results],
+        )
+
+    def test_cancel_closes_document(self) -> None:
+        slow_handler = SlowHandler()
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(slow_handler, [".bin"])
+
+        async def split() -> None:
+            pages = file_handler.asplit_document(BytesIO(b"data"), "file.bin")
+            async for _ in pages:
+                pass
+
+        async def cancel() -> None:
+            task = asyncio.create_task(split())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+
+        self.assertTrue(slow_handler.closed)
+        self.assertLess(slow_handler.pages, 99)
+
+
+if __name__ == "__main__":
+    unittest.main()
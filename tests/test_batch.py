@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import io
+import unittest
+from pathlib import Path
+
+import numpy as np
+from returns.result import Failure, Success
+
+from splitter.file import File, FileOrError, ImageContent
+from splitter.file_handler import FileHandler
+from splitter.image.batch import BatchParams, BatchSink
+from splitter.image.encoder import ImageEncoder
+from splitter.image.image import letterbox
+from splitter.image.image_handler import ImageHandler
+from splitter.image.tiff_handler import TifHandler
+from splitter.pdf.pdf_handler import FitzPdfHandler, PdfHandlerParams
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class TestBatchSink(unittest.TestCase):
+    def test_letterbox(self) -> None:
+        image = np.full((100, 50, 3), 255, np.uint8)
+        dst = np.empty((64, 48, 3), np.uint8)
+
+        ratio, x, y = letterbox(image, dst, pad_value=7)
+        # The height constrains the size: 100x50 -> 64x32, centered
+        self.assertEqual((0.64, 8, 0), (ratio, x, y))
+        self.assertTrue((dst[:, 8:40] == 255).all())
+        self.assertTrue((dst[:, :8] == 7).all())
+        self.assertTrue((dst[:, 40:] == 7).all())
+
+        gray = np.full((10, 40), 100, np.uint8)
+        dst = np.empty((64, 64, 1), np.uint8)
+        self.assertEqual((1.6, 0, 24), letterbox(gray, dst))
+        self.assertEqual(100, dst[24:40].min())
+
+    def test_batches_across_documents(self) -> None:
+        file_handler = FileHandler()
+        file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+        file_handler.register_converter(TifHandler(), [".tiff"])
+        # Pages without arrays are decoded from their stream
+        bytes_only = ImageHandler(encoder=ImageEncoder(output="bytes"))
+        file_handler.register_converter(bytes_only, [".png"])
+
+        sink = BatchSink(BatchParams(batch_size=4, width=320, height=320))
+        batches = []
+        for filename in ("specimen.pdf", "specimen.tiff", "specimen.png"):
+            pages = file_handler.split_document(BASE_PATH / filename)
+            batches += list(sink.add_pages(pages))
+        self.assertEqual([4], [len(batch) for batch in batches])
+        batches.append(sink.flush())
+        self.assertIsNone(sink.flush())
+
+        self.assertEqual((4, 320, 320, 3), batches[0].images.shape)
+        self.assertEqual((3, 320, 320, 3), batches[1].images.shape)
+        self.assertEqual(
+            ["specimen.pdf", "specimen.pdf", "specimen.tiff", "specimen.tiff"],
+            [metadata["original_filename"] for metadata in batches[0].metadata],
+        )
+
+        # 863x443 png: scaled to 320x164, centered vertically
+        metadata = batches[1].metadata[-1]
+        self.assertAlmostEqual(320 / 863, metadata["letterbox_scale"])
+        self.assertEqual(0, metadata["letterbox_offset_x"])
+        self.assertEqual((320 - 164) // 2, metadata["letterbox_offset_y"])
+        image = batches[1].images[-1]
+        self.assertTrue((image[: metadata["letterbox_offset_y"]] == 0).all())
+
+    def test_buffers(self) -> None:
+        sink = BatchSink(BatchParams(batch_size=1, width=8, height=8, buffers=2))
+        image = np.zeros((8, 8, 3), np.uint8)
+        pages: list[FileOrError] = [
+            Success(
+                File(f"page-{i}.png", io.BytesIO(), [ImageContent(image + i, "opencv")])
+            )
+            for i in range(3)
+        ]
+        pages.insert(1, Failure(ValueError("not a page")))
+
+        batches = list(sink.add_pages(pages))
+        self.assertEqual(3, len(batches))
+        # Batches are views on the two buffers, reused in turn
+        self.assertTrue(np.shares_memory(batches[0].images, batches[2].images))
+        self.assertFalse(np.shares_memory(batches[0].images, batches[1].images))
+        self.assertEqual(1, batches[1].images.max())
+
+    def test_text_only_page(self) -> None:
+        handler = FitzPdfHandler(PdfHandlerParams(extraction_mode="text"))
+        file_handler = FileHandler()
+        file_handler.register_converter(handler, [".pdf"])
+        page = next(iter(file_handler.split_document(BASE_PATH / "specimen.pdf")))
+
+        sink = BatchSink()
+        with self.assertRaises(ValueError):
+            sink.add(page.unwrap())
+        self.assertEqual([], list(sink.add_pages([page])))
+        self.assertIsNone(sink.flush())
+
+
+if __name__ == "__main__":
+    unittest.main()
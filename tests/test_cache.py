@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from splitter.cache import CacheStats, SplitCache, get_fingerprint
+from splitter.file_handler import FileHandler
+from splitter.image.encoder import ImageEncoder
+from splitter.image.tiff_handler import TifHandler
+from splitter.mime_reader import MimeReader
+from splitter.pdf.pdf_handler import FitzPdfHandler, PdfHandlerParams
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class TestSplitCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def create_file_handler(self, cache: SplitCache, max_pages: int = 2) -> FileHandler:
+        file_handler = FileHandler(MimeReader(), cache=cache)
+        file_handler.register_converter(
+            FitzPdfHandler(PdfHandlerParams(always_extract_image=False)), [".pdf"]
+        )
+        file_handler.register_converter(TifHandler(max_pages=max_pages), [".tiff"])
+        return file_handler
+
+    def test_replay_hits(self) -> None:
+        cache = SplitCache(self.temp_dir.name)
+        file_handler = self.create_file_handler(cache)
+        file_path = BASE_PATH / "specimen.pdf"
+
+        expected = [page.unwrap() for page in file_handler.split_document(file_path)]
+        results = [page.unwrap() for page in file_handler.split_document(file_path)]
+
+        self.assertEqual(CacheStats(hits=1, misses=1), cache.stats)
+        self.assertEqual(len(expected), len(results))
+        for result, expected_result in zip(results, expected, strict=True):
+            self.assertEqual(expected_result.vpath, result.vpath)
+            self.assertEqual(expected_result.metadata, result.metadata)
+            self.assertEqual(expected_result.text_contents, result.text_contents)
+            self.assertEqual(expected_result.stream.read(), result.stream.read())
+
+        # Entries survive the cache instance
+        cache = SplitCache(self.temp_dir.name)
+        list(self.create_file_handler(cache).split_document(file_path))
+        self.assertEqual(CacheStats(hits=1), cache.stats)
+
+    def test_replay_streams_read_while_iterating(self) -> None:
+        cache = SplitCache(self.temp_dir.name)
+        file_handler = self.create_file_handler(cache, max_pages=4)
+        file_path = BASE_PATH / "specimen.tiff"
+
+        # The usual pattern: each page is read before the next one is split
+        expected = [
+            page.unwrap().stream.read()
+            for page in file_handler.split_document(file_path)
+        ]
+        results = [
+            page.unwrap().stream.read()
+            for page in file_handler.split_document(file_path)
+        ]
+
+        self.assertEqual(CacheStats(hits=1, misses=1), cache.stats)
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(results))
+        self.assertEqual(expected, results)
+
+    def test_replay_under_another_name(self) -> None:
+        cache = SplitCache(self.temp_dir.name)
+        file_handler = self.create_file_handler(cache)
+        pdf_bytes = (BASE_PATH / "specimen.pdf").read_bytes()
+
+        list(file_handler.split_document(pdf_bytes, "a.pdf"))
+        pages = [
+            page.unwrap() for page in file_handler.split_document(pdf_bytes, "b.pdf")
+        ]
+
+        # Same entry, named after the document replayed
+        self.assertEqual(CacheStats(hits=1, misses=1), cache.stats)
+        self.assertEqual(["b.pdf-1.png", "b.pdf-2.png"], [page.vpath for page in pages])
+        self.assertEqual(
+            ["b.pdf", "b.pdf"],
+            [page.metadata["original_filename"] for page in pages],
+        )
+
+    def test_array_output_not_cached(self) -> None:
+        converter = TifHandler(encoder=ImageEncoder(output="array"))
+        self.assertIsNone(get_fingerprint(converter))
+        self.assertIsNotNone(get_fingerprint(TifHandler()))
+
+    def test_key_on_parameters(self) -> None:
+        cache = SplitCache(self.temp_dir.name)
+        file_path = BASE_PATH / "specimen.tiff"
+
+        list(self.create_file_handler(cache, max_pages=1).split_document(file_path))
+        list(self.create_file_handler(cache, max_pages=2).split_document(file_path))
+
+        self.assertEqual(CacheStats(misses=2), cache.stats)
+
+    def test_evict_least_recently_used(self) -> None:
+        cache = SplitCache(self.temp_dir.name, max_bytes=1)
+        file_handler = self.create_file_handler(cache)
+
+        list(file_handler.split_document(BASE_PATH / "specimen.tiff"))
+        list(file_handler.split_document(BASE_PATH / "specimen.tiff"))
+
+        self.assertEqual(CacheStats(misses=2, evictions=2), cache.stats)
+        self.assertEqual(0, cache.size)
+
+    def test_not_cacheable_converter(self) -> None:
+        cache = SplitCache(self.temp_dir.name)
+        file_handler = FileHandler(MimeReader(), cache=cache)
+        nested_handler = FileHandler()
+        converter = type("Converter", (), {"to_files": lambda self, file: []})()
+        converter.handler = nested_handler
+        file_handler.register_converter(converter, [".pdf"])
+
+        list(file_handler.split_document(BASE_PATH / "specimen.pdf"))
+
+        self.assertIsNone(get_fingerprint(converter))
+        self.assertEqual(CacheStats(), cache.stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
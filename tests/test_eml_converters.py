@@ -1,19 +1,26 @@
 from __future__ import annotations
 import base64
+import io
 import logging
+import os
 import time
 import unittest
+from email.message import EmailMessage
 from pathlib import Path
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import cv2
 
 from splitter import File
+from splitter.concurrency import WorkerBudget
+from splitter.eml import attachments
 from splitter.eml.eml_handler import EmlHandler
+from splitter.eml.stdlib_eml_handler import StdlibEmlHandler
 from splitter.file_handler import FileHandler
 from splitter.image.image_handler import ImageHandler
 from splitter.mime_reader import MimeReader
+from splitter.pdf.pdf_handler import FitzPdfHandler
 
 BASE_PATH = Path(__file__).parent / "inputs"
 
@@ -36,6 +43,20 @@ def run_test(
         self.assertEqual(metadata, expected_result["metadata"])
 
 
+class TimedPdfHandler(FitzPdfHandler):
+    """Record where and when each PDF is split, in its page metadata."""
+
+    def to_files(self, file: File, pages: Any = None) -> Any:
+        start = time.time()
+        time.sleep(0.5)
+        results = list(super().to_files(file, pages))
+        for result in results:
+            metadata = result.unwrap().metadata
+            metadata["pid"] = os.getpid()
+            metadata["split_span"] = (start, time.time())
+        return results
+
+
 class TestEmlConverters(unittest.TestCase):
     logger = logging.getLogger(__name__)
 
@@ -81,6 +102,117 @@ class TestEmlConverters(unittest.TestCase):
         eml_handler = EmlHandler(file_handler, True, eml_parser)
         run_test(self, eml_handler, BASE_PATH / "demo.eml", expected_results)
 
+    def test_stdlib_backend(self) -> None:
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(ImageHandler(), [".jpg"])
+        file_path = BASE_PATH / "demo.eml"
+
+        for include_cid, expected_pages in ((True, 2), (False, 1)):
+            pages = []
+            for handler in (
+                EmlHandler(file_handler, include_cid),
+                StdlibEmlHandler(file_handler, include_cid),
+            ):
+                with file_path.open("rb") as file_stream:
+                    results = handler.to_files(File(str(file_path), file_stream))
+                    pages.append(
+                        [
+                            (page.vpath, page.metadata, page.stream.read())
+                            for page in (result.value_or(None) for result in results)
+                            if page is not None
+                        ]
+                    )
+
+            self.assertEqual(expected_pages, len(pages[1]))
+            self.assertEqual(pages[0], pages[1])
+
+    def test_parallel_attachments(self) -> None:
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(ImageHandler(), [".jpg"])
+        file_path = BASE_PATH / "demo.eml"
+
+        def split(workers: int) -> list[tuple[str, bytes] | None]:
+            handler = StdlibEmlHandler(file_handler, workers=workers)
+            with file_path.open("rb") as file_stream:
+                results = handler.to_files(File(str(file_path), file_stream))
+                return [
+                    result.map(lambda page: (page.vpath, page.stream.read())).value_or(
+                        None
+                    )
+                    for result in results
+                ]
+
+        expected = split(0)
+        with patch.object(attachments, "get_worker_budget", lambda: WorkerBudget(4)):
+            self.assertEqual(expected, split(4))
+
+        # No worker left in the budget: attachments are split in this thread
+        budget = WorkerBudget(4)
+        with (
+            patch.object(attachments, "get_worker_budget", lambda: budget),
+            patch.object(attachments, "ThreadPoolExecutor") as executor,
+            budget.reserve(4),
+        ):
+            self.assertEqual(expected, split(4))
+        executor.assert_not_called()
+        self.assertEqual(4, budget.available)
+
+    def test_parallel_pdf_attachments(self) -> None:
+        # PyMuPDF holds the GIL: PDF attachments are split in processes
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(TimedPdfHandler(), [".pdf"])
+        file_handler.register_converter(ImageHandler(), [".png"])
+        self.assertTrue(file_handler.holds_gil(BASE_PATH / "specimen.pdf"))
+        self.assertFalse(file_handler.holds_gil(BASE_PATH / "specimen.png"))
+
+        message = EmailMessage()
+        message["Subject"] = "PDF attachments"
+        message.set_content("body")
+        for filename in ("first.pdf", "photo.png", "second.pdf", "third.pdf"):
+            subtype = filename.rsplit(".", 1)[1]
+            maintype = "application" if subtype == "pdf" else "image"
+            message.add_attachment(
+                (BASE_PATH / f"specimen.{subtype}").read_bytes(),
+                maintype,
+                subtype,
+                filename=filename,
+            )
+        eml_bytes = message.as_bytes()
+
+        def split(workers: int) -> list[File]:
+            handler = StdlibEmlHandler(file_handler, workers=workers)
+            results = handler.to_files(File("message.eml", io.BytesIO(eml_bytes)))
+            return [result.unwrap() for result in results]
+
+        expected = split(0)
+        with patch.object(attachments, "get_worker_budget", lambda: WorkerBudget(4)):
+            results = split(4)
+
+        # Same pages, in the order of the message
+        self.assertEqual(7, len(results))
+        self.assertEqual(
+            [(page.vpath, page.stream.read()) for page in expected],
+            [(page.vpath, page.stream.read()) for page in results],
+        )
+
+        pdf_pages = [page.metadata for page in results if "split_span" in page.metadata]
+        self.assertEqual(6, len(pdf_pages))
+        self.assertNotIn(os.getpid(), {metadata["pid"] for metadata in pdf_pages})
+        # The three PDF attachments were split at the same time
+        starts, ends = zip(
+            *(metadata["split_span"] for metadata in pdf_pages), strict=True
+        )
+        self.assertLess(max(starts), min(ends))
+
+    def test_worker_budget(self) -> None:
+        budget = WorkerBudget(3)
+        with budget.reserve(2) as granted:
+            self.assertEqual(2, granted)
+            with budget.reserve(2) as nested:
+                self.assertEqual(1, nested)
+                self.assertEqual(0, budget.try_acquire(1))
+        self.assertEqual(3, budget.available)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,9 +3,15 @@ import logging
 import time
 import unittest
 from pathlib import Path
+from io import BytesIO
 from typing import TypedDict
 
+import cv2
+import numpy as np
+
+from splitter import File
 from splitter.file_handler import FileHandler
+from splitter.image.encoder import ImageEncoder
 from splitter.image.image_handler import ImageHandler
 from splitter.mime_reader.mime_reader import MimeReader
 
@@ -59,6 +65,49 @@ class TestTIFConverters(unittest.TestCase):
         ]
         run_test(self, file_handler, BASE_PATH / "specimen.png", expected_results)
 
+    def test_reduced_decode(self) -> None:
+        image = cv2.resize(
+            cv2.imread(str(BASE_PATH / "specimen.png")),
+            (4000, 3000),
+            interpolation=cv2.INTER_LINEAR,
+        )
+        jpeg_bytes = cv2.imencode(".jpg", image)[1].tobytes()
+
+        image_handler = ImageHandler(max_size=900)
+        results = image_handler.to_files(File("photo.jpg", BytesIO(jpeg_bytes)))
+        metadata = next(iter(results)).unwrap().metadata
+
+        self.assertEqual(900, metadata["width"])
+        self.assertEqual(675, metadata["height"])
+        self.assertAlmostEqual(900 / 4000, metadata["resized_ratio"])
+
+    def test_encoder(self) -> None:
+        file_path = BASE_PATH / "specimen.png"
+        image = cv2.imread(str(file_path))
+        png_bytes = file_path.read_bytes()
+
+        for encoder, extension, has_bytes, has_array in (
+            (ImageEncoder(), "png", True, True),
+            (ImageEncoder(png_compression=1), "png", True, True),
+            (ImageEncoder(format="jpeg", quality=80), "jpg", True, True),
+            (ImageEncoder(format="webp", output="bytes"), "webp", True, False),
+            (ImageEncoder(format="raw"), "raw", True, True),
+            (ImageEncoder(output="array"), "png", False, True),
+        ):
+            image_handler = ImageHandler(encoder=encoder)
+            results = image_handler.to_files(File("specimen.png", BytesIO(png_bytes)))
+            result = next(iter(results)).unwrap()
+            file_bytes = result.stream.read()
+
+            self.assertEqual(f"specimen.png.{extension}", result.vpath)
+            self.assertEqual(has_bytes, bool(file_bytes))
+            self.assertEqual(has_array, bool(result.contents))
+            if encoder.format == "raw":
+                self.assertEqual(image.tobytes(), file_bytes)
+            elif encoder.format == "png" and has_bytes:
+                decoded = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), -1)
+                self.assertTrue(np.array_equal(image, decoded))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from splitter.cache import get_fingerprint
+from splitter.file_handler import FileHandler
+from splitter.image.tiff_handler import TifHandler
+from splitter.instrumentation import (
+    NO_TIMER,
+    StageEvent,
+    StageStatsCollector,
+    StageTimer,
+)
+from splitter.mime_reader import MimeReader
+from splitter.pdf.pdf_handler import FitzPdfHandler
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class EventRecorder:
+    def __init__(self) -> None:
+        self.events: list[StageEvent] = []
+
+    def on_event(self, event: StageEvent) -> None:
+        self.events.append(event)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_forwarded_to_handlers(self) -> None:
+        recorder = EventRecorder()
+        pdf_handler = FitzPdfHandler()
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(pdf_handler, [".pdf"])
+        file_handler.observer = recorder
+        # Converters registered afterwards receive the observer too
+        file_handler.register_converter(TifHandler(max_pages=1), [".tiff"])
+
+        for file_name in ("specimen.pdf", "specimen.tiff"):
+            for page in file_handler.split_document(BASE_PATH / file_name):
+                page.unwrap()
+
+        pdf_path = str(BASE_PATH / "specimen.pdf")
+        stages = {
+            (event.stage, event.page, event.handler)
+            for event in recorder.events
+            if event.document == pdf_path
+        }
+        # The document is only named once read, unless a filename is given
+        self.assertEqual("read", recorder.events[0].stage)
+        self.assertLessEqual(
+            {
+                ("detect", None, "FileHandler"),
+                ("open", None, "FitzPdfHandler"),
+                ("text", 1, "FitzPdfHandler"),
+                ("render", 2, "FitzPdfHandler"),
+                ("resize", 2, "FitzPdfHandler"),
+                ("encode", 2, "FitzPdfHandler"),
+                ("build", 2, "FitzPdfHandler"),
+            },
+            stages,
+        )
+        self.assertIn(
+            ("decode", 1, "TifHandler"),
+            {(event.stage, event.page, event.handler) for event in recorder.events},
+        )
+
+        # Observers do not change the cache key of the converters
+        file_handler.observer = None
+        fingerprint = get_fingerprint(pdf_handler)
+        file_handler.observer = recorder
+        self.assertIsNotNone(fingerprint)
+        self.assertEqual(fingerprint, get_fingerprint(pdf_handler))
+
+    def test_stats_collector(self) -> None:
+        collector = StageStatsCollector()
+        for duration in range(1, 101):
+            collector.on_event(StageEvent("render", duration / 1000))
+        collector.on_event(StageEvent("open", 0.5))
+
+        summary = collector.summary()
+        self.assertEqual(["open", "render"], list(summary))
+        self.assertEqual(100, summary["render"]["count"])
+        self.assertAlmostEqual(0.0505, summary["render"]["p50"])
+        self.assertAlmostEqual(0.09505, summary["render"]["p95"])
+        self.assertAlmostEqual(0.09901, summary["render"]["p99"])
+        self.assertAlmostEqual(0.5, summary["open"]["p99"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "stages.json"
+            self.assertEqual(summary, json.loads(collector.to_json(path)))
+            self.assertEqual(summary, json.loads(path.read_text()))
+
+    def test_no_observer(self) -> None:
+        timer = StageTimer(None, "document.pdf", "FitzPdfHandler")
+        self.assertIs(NO_TIMER("render", 1), timer("encode", 2))
+        with timer("render", 1):
+            pass
+
+        iterable = [1, 2, 3]
+        self.assertEqual(iterable, list(timer.iterate("decode", iterable)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import io
+import unittest
+from pathlib import Path
+from typing import BinaryIO
+
+from splitter.file_handler import FileHandler, UnsupportedFormatError
+from splitter.mime_reader import MimeReader, SignatureMimeReader
+from splitter.mime_reader.magic_mime_reader import MagicMimeReader
+from splitter.stream import PeekableStream, read_header
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class NonSeekableStream(io.RawIOBase):
+    def __init__(self, file_bytes: bytes) -> None:
+        self._stream = io.BytesIO(file_bytes)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer: bytearray) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class TestMagicMimeReader(unittest.TestCase):
+    def test_restore_stream_position(self) -> None:
+        file_bytes = (BASE_PATH / "specimen.pdf").read_bytes()
+        stream = io.BytesIO(b"garbage" + file_bytes)
+        stream.seek(7)
+
+        mime_type = MagicMimeReader(header_size=1024).get_mime_type("file", stream)
+
+        self.assertEqual("application/pdf", mime_type)
+        self.assertEqual(7, stream.tell())
+
+    def test_non_seekable_stream(self) -> None:
+        file_bytes = (BASE_PATH / "specimen.png").read_bytes()
+        stream = PeekableStream(NonSeekableStream(file_bytes))
+
+        mime_type = MagicMimeReader().get_mime_type("file", stream)
+
+        self.assertEqual("image/png", mime_type)
+        self.assertEqual(file_bytes, stream.read())
+
+    def test_file_handler_non_seekable_stream(self) -> None:
+        file_bytes = (BASE_PATH / "specimen.png").read_bytes()
+        file_handler = FileHandler(
+            MagicMimeReader(), target_mime_types=["image/png"]
+        )
+        stream: BinaryIO = NonSeekableStream(file_bytes)  # type: ignore[assignment]
+
+        results = file_handler.split_document(stream, "specimen")
+        file = next(iter(results)).unwrap()
+
+        self.assertEqual(file_bytes, file.stream.read())
+
+    def test_read_header(self) -> None:
+        stream = io.BytesIO(b"0123456789")
+        stream.seek(2)
+
+        self.assertEqual(b"234", read_header(stream, 3))
+        self.assertEqual(2, stream.tell())
+
+
+class TestSignatureMimeReader(unittest.TestCase):
+    def test_signatures(self) -> None:
+        mime_reader = SignatureMimeReader(fallbacks=[])
+        for header, expected in (
+            (b"%PDF-1.7\n", "application/pdf"),
+            (b"II*\x00\x08\x00\x00\x00", "image/tiff"),
+            (b"MM\x00*\x00\x00\x00\x08", "image/tiff"),
+            (b"\x89PNG\r\n\x1a\n", "image/png"),
+            (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+            (b"GIF89a", "image/gif"),
+            (b"BM\x8a\x00\x00\x00\x00\x00\x00\x00", "image/bmp"),
+            (b"RIFF\x1c\x00\x00\x00WEBPVP8 ", "image/webp"),
+            (b"Received: from mail.example.com", "message/rfc822"),
+            (b"PK\x03\x04\x14\x00", "application/zip"),
+            (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+            (b"hello world", "application/octet-stream"),
+        ):
+            with self.subTest(expected=expected):
+                mime_type = mime_reader.get_mime_type("file", io.BytesIO(header))
+                self.assertEqual(expected, mime_type)
+
+    def test_inputs(self) -> None:
+        mime_reader = SignatureMimeReader(fallbacks=[])
+        for filename, expected in (
+            ("specimen.pdf", "application/pdf"),
+            ("specimen.png", "image/png"),
+            ("specimen.tiff", "image/tiff"),
+            ("demo.eml", "message/rfc822"),
+        ):
+            with (BASE_PATH / filename).open("rb") as stream:
+                self.assertEqual(expected, mime_reader.get_mime_type("file", stream))
+
+    def test_container_subtype(self) -> None:
+        mime_reader = SignatureMimeReader(fallbacks=[])
+        stream = io.BytesIO(b"PK\x03\x04\x14\x00")
+
+        self.assertEqual(
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            mime_reader.get_mime_type("report.docx", stream),
+        )
+        self.assertEqual("application/zip", mime_reader.get_mime_type("a.txt", stream))
+
+    def test_fallback_to_extension(self) -> None:
+        mime_reader = SignatureMimeReader(fallbacks=[MimeReader()])
+        stream = io.BytesIO(b"hello world")
+
+        self.assertEqual("text/plain", mime_reader.get_mime_type("a.txt", stream))
+
+
+class CountingMimeReader(MimeReader):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_mime_type(self, filepath: str, file_stream: BinaryIO) -> str:
+        self.calls += 1
+        return super().get_mime_type(filepath, file_stream)
+
+
+class TestFileHandlerMimeDetection(unittest.TestCase):
+    def test_detect_mime_type_once(self) -> None:
+        mime_reader = CountingMimeReader()
+        file_handler = FileHandler(mime_reader, target_mime_types=["image/png"])
+
+        results = list(file_handler.split_document(BASE_PATH / "specimen.png"))
+
+        self.assertTrue(results[0].unwrap())
+        self.assertEqual(1, mime_reader.calls)
+
+    def test_unsupported_detect_mime_type_once(self) -> None:
+        mime_reader = CountingMimeReader()
+        file_handler = FileHandler(mime_reader, target_mime_types=["application/pdf"])
+
+        results = list(file_handler.split_document(BASE_PATH / "specimen.png"))
+
+        self.assertIsInstance(results[0].failure(), UnsupportedFormatError)
+        self.assertEqual(1, mime_reader.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import unittest
+from pathlib import Path
+
+from splitter.eml.stdlib_eml_handler import StdlibEmlHandler
+from splitter.file_handler import FileHandler
+from splitter.image.image_handler import ImageHandler
+from splitter.mime_reader.mime_reader import MimeReader
+from splitter.pages import PageSelection
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class TestPageSelection(unittest.TestCase):
+    def test_parse(self) -> None:
+        for text, expected in (
+            ("1:3,-1", [0, 1, 2, 9]),
+            ("3, 1", [0, 2]),
+            ("8:", [7, 8, 9]),
+            (":-8", [0, 1, 2]),
+            ("1::4", [0, 4, 8]),
+            ("-2:", [8, 9]),
+            ("12,-11", []),
+        ):
+            with self.subTest(text):
+                self.assertEqual(expected, PageSelection.parse(text).resolve(10))
+
+        for text in ("0", "1-3", "1:3:0", "", "a"):
+            with self.subTest(text), self.assertRaises(ValueError):
+                PageSelection.parse(text)
+
+    def test_of(self) -> None:
+        self.assertIsNone(PageSelection.of(None))
+        self.assertEqual([4], PageSelection.of(-1).resolve(5))
+        self.assertEqual([0, 1, 4], PageSelection.of([slice(2), -1]).resolve(5))
+        selection = PageSelection.parse("2")
+        self.assertIs(selection, PageSelection.of(selection))
+
+    def test_filtered_pages(self) -> None:
+        # The EML handler cannot skip pages: each attachment is filtered
+        attachment_handler = FileHandler(MimeReader())
+        attachment_handler.register_converter(ImageHandler(), [".jpg"])
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(
+            StdlibEmlHandler(attachment_handler), [".eml"]
+        )
+
+        results = list(file_handler.split_document(BASE_PATH / "demo.eml", pages=-1))
+        self.assertEqual(3, len(results))
+        results = list(file_handler.split_document(BASE_PATH / "demo.eml", pages="2:"))
+        # Only the failure of the pptx attachment is left
+        self.assertEqual(1, len(results))
+        self.assertIsNone(results[0].value_or(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,34 @@
 from __future__ import annotations
 
+import io
 import logging
+import pickle
+import tempfile
 import time
 import unittest
+from unittest.mock import patch
 from pathlib import Path
 from typing import TypedDict
 
+import cv2
+import fitz
+import numpy as np
+
 from splitter import File
 from splitter.file import TextContent
+from splitter.concurrency import WorkerBudget
 from splitter.file_handler import FileHandler
 from splitter.mime_reader.mime_reader import MimeReader
-from splitter.pdf.pdf_handler import FitzPdfHandler, PdfHandlerParams
+from splitter.pdf import pdf_handler
+from splitter.pdf.pdf_handler import (
+    FitzPdfHandler,
+    PdfHandlerParams,
+    convert_pixmap_to_rgb,
+    pixmap_to_array,
+)
+from splitter.image.encoder import ImageEncoder
+from splitter.shared_memory import shared_memory_supported
+from splitter.stream import MappedStream
 
 BASE_PATH = Path(__file__).parent / "inputs"
 
@@ -202,6 +220,304 @@ class TestPDFConverters(unittest.TestCase):
         file_path = BASE_PATH / f"{file_name}.pdf"
         run_test(self, str(file_path), file_handler, expected_results)
 
+    def test_render_stats(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        for params, render_dpi, resized in (
+            (PdfHandlerParams(render_stats=True), 188.1, False),
+            (PdfHandlerParams(render_stats=True, min_dpi=250), 250, True),
+        ):
+            file_handler = FileHandler(MimeReader())
+            file_handler.register_converter(FitzPdfHandler(params=params), [".pdf"])
+            for result in file_handler.split_document(str(file_path)):
+                metadata = result.unwrap().metadata
+                self.assertAlmostEqual(render_dpi, metadata["render_dpi"], places=1)
+                self.assertEqual(1, metadata["render_passes"])
+                self.assertEqual(resized, metadata["resized"])
+                self.assertEqual(2200, metadata["height"])
+
+    def test_parallel_rendering(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        sequential = FitzPdfHandler(PdfHandlerParams())
+        parallel = FitzPdfHandler(PdfHandlerParams(workers=2, chunk_size=1))
+
+        with file_path.open("rb") as stream:
+            expected = [
+                result.unwrap()
+                for result in sequential.to_files(File(str(file_path), stream))
+            ]
+        with file_path.open("rb") as stream:
+            results = [
+                result.unwrap()
+                for result in parallel.to_files(File(str(file_path), stream))
+            ]
+
+        self.assertEqual(len(expected), len(results))
+        for result, expected_result in zip(results, expected):
+            self.assertEqual(expected_result.vpath, result.vpath)
+            self.assertEqual(expected_result.metadata, result.metadata)
+            self.assertEqual(expected_result.stream.read(), result.stream.read())
+
+    @unittest.skipUnless(shared_memory_supported(), "POSIX only")
+    def test_parallel_shared_memory(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        encoder = ImageEncoder(output="both")
+        sequential = FitzPdfHandler(PdfHandlerParams(encoder=encoder))
+        parallel = FitzPdfHandler(
+            PdfHandlerParams(
+                encoder=encoder, workers=2, chunk_size=1, shared_memory=True
+            )
+        )
+
+        with file_path.open("rb") as stream:
+            expected = [
+                result.unwrap()
+                for result in sequential.to_files(File(str(file_path), stream))
+            ]
+        # Whatever the number of cores of the machine running the tests
+        with (
+            file_path.open("rb") as stream,
+            patch.object(pdf_handler, "get_worker_budget", lambda: WorkerBudget(2)),
+        ):
+            results = [
+                result.unwrap()
+                for result in parallel.to_files(File(str(file_path), stream))
+            ]
+
+        # Blocks are unlinked once mapped, their directory once the pool is done
+        shm_dir = "/dev/shm" if Path("/dev/shm").is_dir() else tempfile.gettempdir()  # noqa: S108
+        self.assertEqual([], list(Path(shm_dir).glob("splitter-shm-*")))
+
+        # The second page is small enough to be pickled
+        self.assertIsInstance(results[0].stream, MappedStream)
+        self.assertIsInstance(results[1].stream, io.BytesIO)
+        self.assertEqual(len(expected), len(results))
+        for result, expected_result in zip(results, expected, strict=True):
+            self.assertEqual(expected_result.metadata, result.metadata)
+            self.assertEqual(expected_result.stream.read(), result.stream.read())
+            image = result.contents[-1].image
+            np.testing.assert_array_equal(expected_result.contents[-1].image, image)
+            # Copy on write: the page can be drawn on
+            image[0, 0] = 0
+
+    def test_single_page_load(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+
+        with patch.object(
+            fitz.Document,
+            "load_page",
+            autospec=True,
+            side_effect=fitz.Document.load_page,
+        ) as load_page:
+            results = [
+                result.unwrap()
+                for result in file_handler.split_document(str(file_path))
+            ]
+
+        self.assertEqual(len(results), load_page.call_count)
+
+    def test_page_selection(self) -> None:
+        with fitz.open() as document:
+            for number in range(1, 8):
+                document.new_page().insert_text((72, 72), f"Page {number} " * 10)
+            pdf_bytes = document.tobytes()
+
+        for params in (
+            PdfHandlerParams(always_extract_image=False),
+            PdfHandlerParams(always_extract_image=False, workers=2, chunk_size=1),
+        ):
+            file_handler = FileHandler(MimeReader())
+            file_handler.register_converter(FitzPdfHandler(params), [".pdf"])
+
+            with patch.object(
+                fitz.Document,
+                "load_page",
+                autospec=True,
+                side_effect=fitz.Document.load_page,
+            ) as load_page:
+                results = [
+                    result.unwrap()
+                    for result in file_handler.split_document(
+                        pdf_bytes, "document.pdf", pages="1:3,-1"
+                    )
+                ]
+
+            self.assertEqual(
+                [1, 2, 3, 7], [result.metadata["page_number"] for result in results]
+            )
+            self.assertEqual(7, results[-1].metadata["total_pages"])
+            self.assertIn("Page 7", results[-1].text_contents[0].text)
+            if not params.workers:
+                # Unselected pages are neither loaded nor their text extracted
+                self.assertEqual(4, load_page.call_count)
+
+    def test_text_flags(self) -> None:
+        with fitz.open() as document:
+            document.new_page().insert_text((72, 72), "tab\tseparated" + "." * 40)
+            pdf_bytes = document.tobytes()
+
+        for text_flags, expected in (
+            (0, "tab\ufffdseparated"),
+            (fitz.TEXTFLAGS_TEXT, "tab\tseparated"),
+        ):
+            handler = FitzPdfHandler(
+                PdfHandlerParams(always_extract_image=False, text_flags=text_flags)
+            )
+            file = File("document.pdf", io.BytesIO(pdf_bytes))
+            results = [result.unwrap() for result in handler.to_files(file)]
+
+            self.assertEqual(1, len(results))
+            self.assertTrue(results[0].text_contents[0].text.startswith(expected))
+
+    def test_text_extraction_mode(self) -> None:
+        handler = FitzPdfHandler(PdfHandlerParams(extraction_mode="text"))
+
+        with (
+            patch.object(fitz.Page, "get_pixmap") as get_pixmap,
+            patch.object(cv2, "imencode") as imencode,
+        ):
+            for file_name, needs_ocr in (
+                ("specimen", [False, True]),
+                ("scanned_specimen", [True]),
+            ):
+                file_path = BASE_PATH / f"{file_name}.pdf"
+                with file_path.open("rb") as stream:
+                    results = [
+                        result.unwrap()
+                        for result in handler.to_files(File(str(file_path), stream))
+                    ]
+
+                self.assertEqual(
+                    needs_ocr, [result.metadata["needs_ocr"] for result in results]
+                )
+                for result in results:
+                    self.assertEqual(result.contents, result.text_contents)
+                    self.assertEqual(b"", result.stream.read())
+
+        get_pixmap.assert_not_called()
+        imencode.assert_not_called()
+
+    def test_images_extraction_mode(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        handler = FitzPdfHandler(PdfHandlerParams(extraction_mode="images"))
+
+        with (
+            patch.object(fitz.Page, "get_textpage") as get_textpage,
+            file_path.open("rb") as stream,
+        ):
+            results = [
+                result.unwrap()
+                for result in handler.to_files(File(str(file_path), stream))
+            ]
+
+        get_textpage.assert_not_called()
+        self.assertEqual(2, len(results))
+        for result in results:
+            self.assertEqual([], result.text_contents)
+            self.assertEqual(1, len(result.contents))
+            self.assertEqual(2200, result.metadata["height"])
+
+    def test_passthrough_scans(self) -> None:
+        params = PdfHandlerParams(passthrough_scans=True, render_stats=True)
+        handler = FitzPdfHandler(params)
+
+        for width, height, passthrough in ((1600, 2000, True), (1600, 3000, False)):
+            scan = np.full((height, width, 3), 200, np.uint8)
+            jpeg_bytes = cv2.imencode(".jpg", scan)[1].tobytes()
+            with fitz.open() as document:
+                page = document.new_page()
+                page.insert_image(page.rect, stream=jpeg_bytes)
+                pdf_bytes = document.tobytes()
+
+            file = File("scan.pdf", io.BytesIO(pdf_bytes))
+            results = [result.unwrap() for result in handler.to_files(file)]
+
+            self.assertEqual(1, len(results))
+            if passthrough:
+                self.assertEqual("scan.pdf-1.jpg", results[0].vpath)
+                self.assertEqual(jpeg_bytes, results[0].stream.read())
+                self.assertEqual("image/jpeg", results[0].metadata["mime_type"])
+                self.assertEqual(0, results[0].metadata["render_passes"])
+                self.assertEqual([], results[0].contents)
+            else:
+                self.assertEqual("scan.pdf-1.png", results[0].vpath)
+                self.assertNotIn("mime_type", results[0].metadata)
+            self.assertEqual(passthrough, results[0].metadata.get("passthrough", False))
+            self.assertLessEqual(results[0].metadata["height"], 2200)
+
+    def test_encoder(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        encoder = ImageEncoder(format="jpeg", output="array")
+        handler = FitzPdfHandler(PdfHandlerParams(encoder=encoder))
+
+        with (
+            patch.object(cv2, "imencode") as imencode,
+            file_path.open("rb") as stream,
+        ):
+            results = [
+                result.unwrap()
+                for result in handler.to_files(File(str(file_path), stream))
+            ]
+
+        imencode.assert_not_called()
+        self.assertEqual(2, len(results))
+        for result in results:
+            self.assertTrue(result.vpath.endswith(".jpg"))
+            self.assertEqual(b"", result.stream.read())
+            self.assertEqual(2200, result.contents[-1].image.shape[0])
+
+    def test_lazy_encoding(self) -> None:
+        file_path = BASE_PATH / "specimen.pdf"
+        eager = FitzPdfHandler(PdfHandlerParams())
+        lazy = FitzPdfHandler(PdfHandlerParams(encoder=ImageEncoder(lazy=True)))
+
+        with file_path.open("rb") as stream:
+            expected = [
+                result.unwrap()
+                for result in eager.to_files(File(str(file_path), stream))
+            ]
+        with (
+            patch.object(cv2, "imencode", wraps=cv2.imencode) as imencode,
+            file_path.open("rb") as stream,
+        ):
+            results = [
+                result.unwrap()
+                for result in lazy.to_files(File(str(file_path), stream))
+            ]
+            imencode.assert_not_called()
+
+            self.assertEqual(expected[0].stream.read(), results[0].stream.read())
+            self.assertEqual(1, imencode.call_count)
+
+        # Process pools receive the encoded bytes
+        copy = pickle.loads(pickle.dumps(results[1]))  # noqa: S301
+        self.assertEqual(expected[1].stream.read(), copy.stream.read())
+
+        results[1].release()
+        self.assertEqual(results[1].text_contents, results[1].contents)
+        with self.assertRaises(ValueError):
+            results[1].stream.read()
+
+    def test_pixmap_to_array(self) -> None:
+        with fitz.open(BASE_PATH / "specimen.pdf") as document:
+            page = document[0]
+            for colorspace in (fitz.csRGB, fitz.csGRAY, fitz.csCMYK):
+                for alpha in (False, True):
+                    pix = page.get_pixmap(
+                        matrix=fitz.Matrix(0.5, 0.5), colorspace=colorspace, alpha=alpha
+                    )
+                    png_bytes = convert_pixmap_to_rgb(pix).tobytes()
+                    expected = cv2.imdecode(
+                        np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_COLOR
+                    )
+                    image = pixmap_to_array(pix)
+
+                    self.assertEqual(expected.shape, image.shape)
+                    self.assertLessEqual(
+                        np.abs(expected.astype(int) - image.astype(int)).max(), 1
+                    )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import io
+import struct
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from splitter import File
+from splitter.eml.stdlib_eml_handler import StdlibEmlHandler
+from splitter.file_handler import FileHandler, UnsupportedFormatError
+from splitter.image.header import ImageHeader, read_image_header, read_tiff_headers
+from splitter.image.image_handler import ImageHandler
+from splitter.image.tiff_handler import TifHandler
+from splitter.pdf.pdf_handler import FitzPdfHandler, PdfHandlerParams
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+
+class NonSeekableStream(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+
+class TestProbe(unittest.TestCase):
+    def setUp(self) -> None:
+        self.file_handler = FileHandler()
+        self.file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+        self.file_handler.register_converter(TifHandler(max_pages=2), [".tiff"])
+        self.file_handler.register_converter(ImageHandler(), [".png", ".jpg"])
+
+    def test_pdf(self) -> None:
+        probe = self.file_handler.probe(BASE_PATH / "specimen.pdf").unwrap()
+        self.assertEqual("application/pdf", probe.mime_type)
+        self.assertEqual((BASE_PATH / "specimen.pdf").stat().st_size, probe.size)
+        self.assertEqual(2, probe.total_pages)
+        self.assertAlmostEqual(594.96, probe.pages[0].width, places=2)
+        self.assertTrue(probe.pages[0].has_text)
+        self.assertFalse(probe.pages[0].is_scan)
+        # Rendered at 300 dpi, down to a longest side of 2200 pixels
+        self.assertEqual(1554 * 2200, probe.pages[0].pixels)
+
+        text_handler = FitzPdfHandler(PdfHandlerParams(extraction_mode="text"))
+        with (BASE_PATH / "specimen.pdf").open("rb") as stream:
+            text_probe = text_handler.probe(
+                File("specimen.pdf", stream=stream)
+            ).unwrap()
+        self.assertEqual([0, 0], [page.pixels for page in text_probe.pages])
+        self.assertLess(text_probe.cost, probe.cost)
+
+    def test_file_left_untouched(self) -> None:
+        # Non seekable streams are wrapped by the handler, in its own File
+        pdf_bytes = (BASE_PATH / "specimen.pdf").read_bytes()
+        for split in (self.file_handler.probe, self.file_handler.split_document):
+            stream = NonSeekableStream(pdf_bytes)
+            file = File("specimen.pdf", stream=stream)
+            split(file)
+            self.assertIs(stream, file.stream)
+
+    def test_tiff(self) -> None:
+        probe = self.file_handler.probe(BASE_PATH / "specimen.tiff").unwrap()
+        self.assertEqual(4, probe.total_pages)
+        # max_pages
+        self.assertEqual(2, len(probe.pages))
+        self.assertEqual((1653, 2339), (probe.pages[0].width, probe.pages[0].height))
+
+    def test_image(self) -> None:
+        png_bytes = (BASE_PATH / "specimen.png").read_bytes()
+        stream = io.BytesIO(png_bytes)
+        probe = self.file_handler.probe(stream, "specimen.png").unwrap()
+        self.assertEqual("image/png", probe.mime_type)
+        self.assertEqual((863, 443), (probe.pages[0].width, probe.pages[0].height))
+        self.assertIsNone(probe.pages[0].has_text)
+        # The stream can still be split
+        self.assertEqual(0, stream.tell())
+        pages = list(self.file_handler.split_document(stream, "specimen.png"))
+        self.assertEqual(863, pages[0].unwrap().metadata["width"])
+
+    def test_eml(self) -> None:
+        eml_handler = FileHandler()
+        eml_handler.register_converter(StdlibEmlHandler(self.file_handler), [".eml"])
+        probe = eml_handler.probe(BASE_PATH / "demo.eml").unwrap()
+
+        # The pptx attachment is not supported
+        self.assertEqual(
+            ["image001.jpg", "150.jpg"],
+            [attachment.filename for attachment in probe.attachments],
+        )
+        self.assertEqual(2, probe.total_pages)
+        self.assertGreater(probe.cost, sum(a.cost for a in probe.attachments))
+
+    def test_unsupported(self) -> None:
+        probe = self.file_handler.probe(b"text", "document.txt")
+        self.assertIsInstance(probe.failure(), UnsupportedFormatError)
+
+    def test_image_headers(self) -> None:
+        image = np.zeros((37, 53, 3), np.uint8)
+        for extension in (".png", ".jpg", ".bmp", ".webp", ".tiff"):
+            with self.subTest(extension):
+                _, buffer = cv2.imencode(extension, image)
+                header = read_image_header(buffer.tobytes())
+                self.assertIsNotNone(header)
+                self.assertEqual((53, 37), (header.width, header.height))
+
+        gif = b"GIF89a" + struct.pack("<HH", 53, 37) + b"\x00" * 8
+        self.assertEqual(ImageHeader("gif", 53, 37), read_image_header(gif))
+        # Extended WebP, 24 bits dimensions minus one
+        webp = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + b"4\x00\x00$\x00\x00"
+        self.assertEqual(ImageHeader("webp", 53, 37), read_image_header(webp))
+        self.assertIsNone(read_image_header(b"\x89PNG\r\n\x1a\n"))
+
+        _, tiff = cv2.imencodemulti(".tiff", [image, np.zeros((10, 20), np.uint8)])
+        self.assertEqual(
+            [ImageHeader("tiff", 53, 37), ImageHeader("tiff", 20, 10)],
+            read_tiff_headers(tiff.tobytes()),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
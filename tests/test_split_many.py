@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import logging
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest.mock import patch
+
+from splitter.file_handler import FileHandler, UnsupportedFormatError
+from splitter.image.image_handler import ImageHandler
+from splitter.image.tiff_handler import TifHandler
+from splitter.mime_reader import MimeReader
+from splitter.pdf.pdf_handler import FitzPdfHandler
+from splitter import pool
+from splitter.pool import PoolParams
+from splitter.shared_memory import shared_memory_supported
+from splitter.stream import MappedStream
+
+BASE_PATH = Path(__file__).parent / "inputs"
+
+INPUTS = {
+    "specimen.pdf": BASE_PATH / "specimen.pdf",
+    "specimen.tiff": BASE_PATH / "specimen.tiff",
+    "specimen.png": BASE_PATH / "specimen.png",
+    "scanned_specimen.pdf": BASE_PATH / "scanned_specimen.pdf",
+    "demo.eml": BASE_PATH / "demo.eml",
+}
+
+EXPECTED_PAGES = {
+    "specimen.pdf": 2,
+    "specimen.tiff": 4,
+    "specimen.png": 1,
+    "scanned_specimen.pdf": 1,
+    "demo.eml": 1,
+}
+
+
+def create_file_handler() -> FileHandler:
+    file_handler = FileHandler(MimeReader())
+    file_handler.register_converter(FitzPdfHandler(), [".pdf"])
+    file_handler.register_converter(TifHandler(), [".tiff"])
+    file_handler.register_converter(ImageHandler(), [".png"])
+    return file_handler
+
+
+def create_passthrough_handler() -> FileHandler:
+    # Documents without converter are returned as is, with their input stream
+    return FileHandler(MimeReader(), target_extensions=[".txt"])
+
+
+class TestSplitMany(unittest.TestCase):
+    logger = logging.getLogger(__name__)
+
+    def check_results(self, results: list, ordered: bool) -> None:
+        input_ids = [input_id for input_id, _ in results]
+        self.assertEqual(EXPECTED_PAGES, dict(Counter(input_ids)))
+
+        if ordered:
+            # Pages are grouped per document, in the order of the inputs
+            grouped = list(dict.fromkeys(input_ids))
+            self.assertEqual(list(INPUTS), grouped)
+            self.assertEqual(sorted(input_ids, key=grouped.index), input_ids)
+
+        for input_id, page in results:
+            if input_id == "demo.eml":
+                self.assertIsInstance(page.failure(), UnsupportedFormatError)
+            else:
+                self.assertEqual(input_id, page.unwrap().metadata["original_filename"])
+
+    def test_split_many_threads(self) -> None:
+        file_handler = create_file_handler()
+        for ordered in (True, False):
+            for max_pending_pages in (1, 64):
+                params = PoolParams(max_pending_pages=max_pending_pages)
+                results = list(
+                    file_handler.split_many(
+                        INPUTS, workers=3, ordered=ordered, params=params
+                    )
+                )
+                self.check_results(results, ordered)
+
+    def test_split_many_bytes_budget(self) -> None:
+        file_handler = create_file_handler()
+        params = PoolParams(max_pending_pages=None, max_pending_bytes=1)
+        results = list(file_handler.split_many(INPUTS, workers=2, params=params))
+        self.check_results(results, ordered=True)
+
+    def test_split_many_indexes(self) -> None:
+        file_handler = create_file_handler()
+        results = list(file_handler.split_many(list(INPUTS.values()), workers=2))
+        self.assertEqual(
+            [0, 0, 1, 1, 1, 1, 2, 3, 4], [input_id for input_id, _ in results]
+        )
+
+    def test_split_many_bytes_inputs(self) -> None:
+        file_handler = create_file_handler()
+        inputs = {"photo.png": (BASE_PATH / "specimen.png").read_bytes()}
+        input_id, page = next(iter(file_handler.split_many(inputs)))
+
+        self.assertEqual("photo.png", input_id)
+        self.assertEqual("photo.png", page.unwrap().metadata["original_filename"])
+
+    def test_split_many_processes_bytes_inputs(self) -> None:
+        file_handler = FileHandler()
+        params = PoolParams(executor="process", handler_factory=create_file_handler)
+        data = {name: path.read_bytes() for name, path in INPUTS.items()}
+        results = list(file_handler.split_many(data, workers=2, params=params))
+        self.check_results(results, ordered=True)
+
+        # Without a filename, their format cannot be detected
+        with self.assertRaisesRegex(ValueError, "must be a filename"):
+            list(file_handler.split_many(list(data.values()), params=params))
+
+    def test_split_many_stop_early(self) -> None:
+        file_handler = create_file_handler()
+        params = PoolParams(max_pending_pages=1)
+        results = file_handler.split_many(INPUTS, workers=2, params=params)
+
+        self.assertEqual("specimen.pdf", next(results)[0])
+        results.close()
+
+    def test_split_many_processes(self) -> None:
+        file_handler = FileHandler()
+        params = PoolParams(executor="process", handler_factory=create_file_handler)
+        for ordered in (True, False):
+            results = list(
+                file_handler.split_many(
+                    INPUTS, workers=2, ordered=ordered, params=params
+                )
+            )
+            self.check_results(results, ordered)
+
+    def test_split_many_processes_backpressure(self) -> None:
+        file_handler = FileHandler()
+        params = PoolParams(
+            executor="process",
+            max_pending_pages=1,
+            handler_factory=create_file_handler,
+        )
+        for ordered in (True, False):
+            results = list(
+                file_handler.split_many(
+                    INPUTS, workers=3, ordered=ordered, params=params
+                )
+            )
+            self.check_results(results, ordered)
+
+        # The workers blocked on the budget are released
+        results = file_handler.split_many(INPUTS, workers=3, params=params)
+        self.assertEqual("specimen.pdf", next(results)[0])
+        results.close()
+
+    def test_split_many_processes_passthrough(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "notes.txt"
+            file_path.write_bytes(b"some notes")
+            params = PoolParams(handler_factory=create_passthrough_handler)
+            results = list(
+                FileHandler().split_many([file_path], workers=1, params=params)
+            )
+
+        # The mapped input stream comes back from the worker as bytes
+        self.assertEqual(1, len(results))
+        self.assertEqual(b"some notes", results[0][1].unwrap().stream.read())
+
+    def test_split_many_default_executor(self) -> None:
+        # Processes as soon as the handler can be built in the workers
+        file_handler = FileHandler()
+        params = PoolParams(handler_factory=create_file_handler)
+        with patch.object(
+            pool, "_split_in_processes", wraps=pool._split_in_processes
+        ) as split_in_processes:
+            results = list(file_handler.split_many(INPUTS, workers=2, params=params))
+        split_in_processes.assert_called_once()
+        self.check_results(results, ordered=True)
+
+    @unittest.skipUnless(shared_memory_supported(), "POSIX only")
+    def test_split_many_shared_memory(self) -> None:
+        file_handler = FileHandler()
+        params = PoolParams(
+            executor="process",
+            handler_factory=create_file_handler,
+            shared_memory=True,
+        )
+        results = list(file_handler.split_many(INPUTS, workers=2, params=params))
+        self.check_results(results, ordered=True)
+
+        _, page = results[0]
+        self.assertIsInstance(page.unwrap().stream, MappedStream)
+        self.assertEqual((2200, 1555, 3), page.unwrap().contents[-1].image.shape)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import logging
+import mmap
 import time
 import unittest
 from pathlib import Path
+from io import BytesIO
 from typing import TypedDict
 
+import cv2
+import numpy as np
+
+from splitter import File
 from splitter.file_handler import FileHandler
 from splitter.mime_reader.mime_reader import MimeReader
-from splitter.image.tiff_handler import TifHandler
+from splitter.image.tiff_handler import TifHandler, count_tiff_pages
+from splitter.stream import MappedStream, read_buffer
 
 
 BASE_PATH = Path(__file__).parent / "inputs"
@@ -91,6 +98,56 @@ class TestTIFConverters(unittest.TestCase):
         ]
         run_test(self, file_handler, BASE_PATH / "specimen.tiff", expected_results)
 
+    def test_count_tiff_pages(self) -> None:
+        file_bytes = (BASE_PATH / "specimen.tiff").read_bytes()
+        self.assertEqual(4, count_tiff_pages(file_bytes))
+
+    def test_decode_selected_pages_only(self) -> None:
+        images = [np.full((30, 40), index * 10, np.uint8) for index in range(20)]
+        _, file_bytes = cv2.imencodemulti(".tiff", images)
+
+        tiff_handler = TifHandler(max_pages=3)
+        results = tiff_handler.to_files(File("fax.tiff", BytesIO(file_bytes.tobytes())))
+        files = [result.unwrap() for result in results]
+
+        self.assertEqual(3, len(files))
+        for index, file in enumerate(files):
+            self.assertEqual(20, file.metadata["total_pages"])
+            np.testing.assert_array_equal(images[index], file.contents[0].image)
+
+    def test_page_selection(self) -> None:
+        images = [np.full((30, 40), index * 10, np.uint8) for index in range(20)]
+        _, file_bytes = cv2.imencodemulti(".tiff", images)
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(TifHandler(max_pages=3), [".tiff"])
+
+        results = file_handler.split_document(
+            file_bytes.tobytes(), "fax.tiff", pages=[slice(1, 12, 5), -1, 0]
+        )
+        files = [result.unwrap() for result in results]
+
+        self.assertEqual([1, 2, 7], [file.metadata["page_number"] for file in files])
+        np.testing.assert_array_equal(images[6], files[2].contents[0].image)
+
+    def test_memory_mapped_input(self) -> None:
+        file_path = BASE_PATH / "specimen.tiff"
+        file_handler = FileHandler(MimeReader())
+        file_handler.register_converter(TifHandler(max_size=2200), [".tiff"])
+
+        with MappedStream(file_path) as stream:
+            buffer = read_buffer(stream)
+            self.assertIsInstance(buffer, memoryview)
+            self.assertIsInstance(buffer.obj, mmap.mmap)
+            buffer.release()
+
+        expected = file_handler.split_document(file_path.read_bytes(), file_path.name)
+        results = file_handler.split_document(file_path)
+        for result, expected_result in zip(results, expected, strict=True):
+            np.testing.assert_array_equal(
+                expected_result.unwrap().contents[0].image,
+                result.unwrap().contents[0].image,
+            )
+
 
 if __name__ == "__main__":
     unittest.main()